@@ -0,0 +1,155 @@
+"""
+Бенчмарк отправки писем через EmailService.send_email на локальный
+SMTP-сервер (benchmarks.smtp_sink) с заданной частотой
+
+Сравниваются:
+- per-message: новое соединение на каждое письмо (так работала отправка
+  через FastMail до появления пула соединений);
+- pool: пул постоянных соединений из настроек SMTP_POOL_*
+
+Письма запускаются по расписанию с частотой --rate писем в секунду
+в течение --duration секунд независимо от того, успели ли отправиться
+предыдущие, а задержка отсчитывается от запланированного момента
+отправки, поэтому очередь перед почтовым сервером входит в задержку
+
+Сервер запускается в том же процессе с задержками и долей ошибок из
+аргументов; вместо него можно указать внешний сервер через --host и --port
+
+Запуск: python -m benchmarks.bench_email [--rate 200] [--duration 10]
+[--connect-latency 0.05] [--latency 0.01] [--failure-rate 0.01]
+(требуются переменные окружения из .env)
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import List, Optional
+from uuid import uuid4
+
+from benchmarks.smtp_sink import SMTPSink
+from src.database.models import User
+from src.services.email import EmailService
+from src.services.smtp_pool import SMTPConnectionPool
+from src.settings import project_settings
+
+
+def build_pool(host: str, port: int, per_message: bool) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        hostname=host,
+        port=port,
+        size=project_settings.SMTP_POOL_SIZE,
+        idle_timeout=project_settings.SMTP_POOL_IDLE_TIMEOUT_SECONDS,
+        health_check_after=project_settings.SMTP_POOL_HEALTH_CHECK_AFTER_SECONDS,
+        max_messages_per_connection=1 if per_message else project_settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+        batch_size=1 if per_message else project_settings.SMTP_POOL_BATCH_SIZE,
+        timeout=project_settings.SMTP_TIMEOUT_SECONDS,
+    )
+
+
+async def send_at(
+        email_service: EmailService,
+        user: User,
+        scheduled_at: float,
+        latencies: List[float],
+        errors: Counter,
+) -> None:
+    try:
+        await email_service.send_email(
+            email=[user.email, ],
+            subject="Письмо для подтверждения регистрации",
+            instance=user,
+        )
+    except Exception as exc:
+        errors[type(exc).__name__] += 1
+    else:
+        latencies.append(time.perf_counter() - scheduled_at)
+
+
+async def run(name: str, pool: SMTPConnectionPool, rate: float, duration: float) -> None:
+    email_service: EmailService = EmailService(pool=pool)
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    tasks: List[asyncio.Task] = []
+
+    pool.start()
+    started_at: float = time.perf_counter()
+    for index in range(int(rate * duration)):
+        scheduled_at: float = started_at + index / rate
+        delay: float = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        user: User = User(user_id=uuid4(), email=f"user{index}@example.com")
+        tasks.append(asyncio.create_task(
+            send_at(email_service, user, scheduled_at, latencies, errors)
+        ))
+
+    await asyncio.gather(*tasks)
+    elapsed: float = time.perf_counter() - started_at
+    await pool.close()
+
+    p50: Optional[float] = None
+    p99: Optional[float] = None
+    if len(latencies) >= 2:
+        quantiles: List[float] = statistics.quantiles(latencies, n=100)
+        p50, p99 = quantiles[49], quantiles[98]
+
+    print(
+        f"{name:>12}: {len(latencies) / elapsed:8.1f} emails/s, "
+        f"p50 {p50 * 1000 if p50 is not None else float('nan'):8.1f} ms, "
+        f"p99 {p99 * 1000 if p99 is not None else float('nan'):8.1f} ms, "
+        f"sent {len(latencies)}, errors {sum(errors.values())} {dict(errors)}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    sink: Optional[SMTPSink] = None
+    host, port = args.host, args.port
+    if port is None:
+        sink = SMTPSink(
+            connect_latency=args.connect_latency,
+            latency=args.latency,
+            failure_rate=args.failure_rate,
+            disconnect_rate=args.disconnect_rate,
+        )
+        await sink.start()
+        host, port = sink.host, sink.port
+
+    try:
+        for name in args.modes:
+            await run(
+                name=name,
+                pool=build_pool(host=host, port=port, per_message=name == "per-message"),
+                rate=args.rate,
+                duration=args.duration,
+            )
+            if sink is not None:
+                print(
+                    f"{'sink':>12}: connections {sink.connections}, accepted {sink.accepted}, "
+                    f"rejected {sink.rejected}, dropped {sink.dropped}"
+                )
+                sink.connections = sink.accepted = sink.rejected = sink.dropped = 0
+    finally:
+        if sink is not None:
+            await sink.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--modes", nargs="+", choices=["per-message", "pool"], default=["per-message", "pool"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--disconnect-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
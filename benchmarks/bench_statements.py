@@ -0,0 +1,66 @@
+"""
+Микробенчмарк стоимости подготовки запроса поиска пользователя по e-mail
+на стороне Python (без обращения к базе данных)
+
+Сравниваются:
+- uncached: построение select(...) и его полная компиляция (так выглядит
+  каждый вызов при отключенном или переполненном кэше компиляции);
+- select: построение select(...) и вычисление ключа кэша, по которому
+  SQLAlchemy находит уже скомпилированный запрос;
+- lambda: lambda_stmt из UserDAL, для которого конструкция запроса
+  и ключ кэша вычисляются один раз, а затем подставляется лишь параметр
+
+Запуск: python -m benchmarks.bench_statements [--number N]
+"""
+import argparse
+import timeit
+from typing import Callable, Dict
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from src.database.models import User
+from src.services.dal import select_user_by_email
+
+DIALECT = asyncpg.dialect()
+EMAIL: str = "user@example.com"
+
+
+def build_uncached() -> None:
+    select(User).filter_by(email=EMAIL).compile(dialect=DIALECT)
+
+
+def build_select() -> None:
+    select(User).filter_by(email=EMAIL)._generate_cache_key()
+
+
+def build_lambda() -> None:
+    select_user_by_email(email=EMAIL)._generate_cache_key()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    cases: Dict[str, Callable[[], None]] = {
+        "uncached": build_uncached,
+        "select": build_select,
+        "lambda": build_lambda,
+    }
+
+    for case in cases.values():
+        case()
+
+    results: Dict[str, float] = {}
+    for name, case in cases.items():
+        seconds: float = min(timeit.repeat(case, number=args.number, repeat=5))
+        results[name] = seconds / args.number * 1_000_000
+        print(f"{name:>10}: {results[name]:8.2f} us/query")
+
+    saved: float = results["select"] - results["lambda"]
+    print(f"{'saved':>10}: {saved:8.2f} us/query compared to select(...)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк проверки токенов доступа: полное декодирование jose
+(разбор, проверка HMAC-подписи и срока действия) против попадания
+в кэш проверенных токенов
+
+Моделируется поток запросов, в котором --clients клиентов повторно
+используют свои токены (в среднем --reuse раз каждый), что соответствует
+многократному использованию одного токена до истечения его срока
+
+Запуск: python -m benchmarks.bench_token_cache [--clients 1000] [--reuse 200]
+(требуются переменные окружения из .env)
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+from typing import List
+from uuid import uuid4
+
+from jose import jwt
+
+from src.schemas.schemas import TokenClaimsSchema
+from src.services import security
+from src.services.security import create_jwt_token, decode_jwt_token
+from src.settings import project_settings
+
+
+def decode_without_cache(token: str) -> dict:
+    return jwt.decode(
+        token,
+        project_settings.SECRET_KEY,
+        algorithms=[project_settings.ALGORITHM, ],
+    )
+
+
+def run(name: str, tokens: List[str], decode) -> float:
+    started_at: float = time.perf_counter()
+    for token in tokens:
+        decode(token)
+    duration: float = time.perf_counter() - started_at
+
+    per_request_us: float = duration / len(tokens) * 1_000_000
+    print(
+        f"{name:>8}: {per_request_us:8.2f} us/request, "
+        f"{len(tokens) / duration:12.0f} requests/s"
+    )
+    return per_request_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--reuse", type=int, default=200)
+    args = parser.parse_args()
+
+    client_tokens: List[str] = [
+        create_jwt_token(
+            claims=TokenClaimsSchema(user_id=uuid4(), is_verified=True, token_version=0),
+            exp_timedelta=timedelta(minutes=project_settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        )
+        for _ in range(args.clients)
+    ]
+    requests: List[str] = [
+        random.choice(client_tokens) for _ in range(args.clients * args.reuse)
+    ]
+
+    security._verified_tokens.clear()
+    jose: float = run("jose", requests, decode_without_cache)
+    cached: float = run("cached", requests, decode_jwt_token)
+    print(f"{'speedup':>8}: {jose / cached:8.1f}x ({len(security._verified_tokens)} cached tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Локальный SMTP-сервер, принимающий и отбрасывающий письма. Используется
+вместо настоящего почтового сервера в бенчмарках и при локальной отладке
+
+Сервер реализует минимальное подмножество SMTP (EHLO/HELO, AUTH, MAIL,
+RCPT, DATA, RSET, NOOP, QUIT) без TLS и умеет имитировать медленный
+или ненадежный почтовый сервер:
+- --connect-latency: задержка приветствия (установка соединения, TLS, AUTH);
+- --latency: задержка ответа на каждое письмо;
+- --failure-rate: доля писем, отклоняемых временной ошибкой 451;
+- --disconnect-rate: доля писем, при получении которых соединение разрывается
+
+Запуск: python -m benchmarks.smtp_sink [--port 1025] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import random
+from typing import List, Optional
+
+
+class SMTPSink:
+    """
+    Асинхронный SMTP-сервер, считающий принятые, отклоненные письма
+    и установленные соединения
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            connect_latency: float = 0,
+            latency: float = 0,
+            failure_rate: float = 0,
+            disconnect_rate: float = 0,
+    ):
+        self.host: str = host
+        self.port: int = port
+        self.connect_latency: float = connect_latency
+        self.latency: float = latency
+        self.failure_rate: float = failure_rate
+        self.disconnect_rate: float = disconnect_rate
+
+        self.connections: int = 0
+        self.accepted: int = 0
+        self.rejected: int = 0
+        self.dropped: int = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Метод, запускающий сервер. Если порт равен 0, выбирается свободный порт"""
+
+        self._server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "SMTPSink":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        try:
+            await asyncio.sleep(self.connect_latency)
+            await reply("220 localhost SMTP sink")
+
+            while True:
+                line: bytes = await reader.readline()
+                if not line:
+                    return
+
+                command: str = line.decode(errors="replace").strip().upper()
+                if command.startswith("EHLO"):
+                    await reply("250-localhost")
+                    await reply("250-AUTH PLAIN LOGIN")
+                    await reply("250 8BITMIME")
+                elif command.startswith("HELO"):
+                    await reply("250 localhost")
+                elif command.startswith("AUTH"):
+                    await self._authenticate(command=command, reader=reader, reply=reply)
+                elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+
+                    await asyncio.sleep(self.latency)
+                    if random.random() < self.disconnect_rate:
+                        self.dropped += 1
+                        return
+                    if random.random() < self.failure_rate:
+                        self.rejected += 1
+                        await reply("451 Temporary failure")
+                    else:
+                        self.accepted += 1
+                        await reply("250 Message accepted")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    return
+                else:
+                    await reply("502 Command not implemented")
+
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _authenticate(command: str, reader: asyncio.StreamReader, reply) -> None:
+        """
+        Вспомогательный метод, принимающий любые учетные данные
+        механизмами PLAIN и LOGIN
+        """
+
+        arguments: List[str] = command.split()
+        prompts: List[str] = []
+        if len(arguments) > 1 and arguments[1] == "LOGIN":
+            prompts = ["334 UGFzc3dvcmQ6"] if len(arguments) > 2 else ["334 VXNlcm5hbWU6", "334 UGFzc3dvcmQ6"]
+        elif len(arguments) == 2:
+            prompts = ["334 "]
+
+        for prompt in prompts:
+            await reply(prompt)
+            await reader.readline()
+
+        await reply("235 Authentication successful")
+
+
+async def serve(args: argparse.Namespace) -> None:
+    sink: SMTPSink = SMTPSink(
+        host=args.host,
+        port=args.port,
+        connect_latency=args.connect_latency,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        disconnect_rate=args.disconnect_rate,
+    )
+    async with sink:
+        print(f"SMTP sink is listening on {sink.host}:{sink.port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            print(
+                f"connections: {sink.connections}, accepted: {sink.accepted}, "
+                f"rejected: {sink.rejected}, dropped: {sink.dropped}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--connect-latency", type=float, default=0)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--disconnect-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
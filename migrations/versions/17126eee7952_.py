@@ -0,0 +1,92 @@
+"""add indexes for user listing, updated_at and case-insensitive email
+
+Revision ID: 17126eee7952
+Revises: f8203400838e
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '17126eee7952'
+down_revision: Union[str, None] = 'f8203400838e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_invalid_index(name: str) -> None:
+    """
+    Функция, удаляющая индекс, если он помечен как INVALID. Такой индекс
+    остается после прерванного или неудачного CREATE INDEX CONCURRENTLY,
+    и при повторном запуске IF NOT EXISTS оставил бы его без изменений
+    """
+
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT NOT indisvalid FROM pg_index "
+            "WHERE indexrelid = to_regclass(CAST(:name AS text))"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.drop_index(name, table_name='user', postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name in ('ix_user_verified_created_at', 'ix_user_updated_at', 'uq_user_email_lower'):
+            drop_invalid_index(name)
+
+        op.create_index(
+            'ix_user_verified_created_at',
+            'user',
+            ['created_at', 'user_id'],
+            unique=False,
+            postgresql_where=sa.text('is_verified'),
+            postgresql_include=['name', 'surname', 'username', 'email'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_user_updated_at',
+            'user',
+            ['updated_at'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'uq_user_email_lower',
+            'user',
+            [sa.text('lower(email)')],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_user_email_lower',
+            table_name='user',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_user_updated_at',
+            table_name='user',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_user_verified_created_at',
+            table_name='user',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,36 @@
+"""add revoked_token table
+
+Revision ID: 5c0d2b7e91a4
+Revises: 740b5a1c491f
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0d2b7e91a4'
+down_revision: Union[str, None] = '740b5a1c491f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'revoked_token',
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('token_version', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'token_version')
+    )
+    op.create_index(
+        op.f('ix_revoked_token_expires_at'), 'revoked_token', ['expires_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revoked_token_expires_at'), table_name='revoked_token')
+    op.drop_table('revoked_token')
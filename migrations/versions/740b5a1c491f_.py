@@ -0,0 +1,29 @@
+"""add user token_version
+
+Revision ID: 740b5a1c491f
+Revises: 17126eee7952
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '740b5a1c491f'
+down_revision: Union[str, None] = '17126eee7952'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user',
+        sa.Column('token_version', sa.Integer(), server_default=sa.text('0'), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'token_version')
@@ -0,0 +1,56 @@
+"""add email_outbox table
+
+Revision ID: 9e4a61c3d8b2
+Revises: 5c0d2b7e91a4
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a61c3d8b2'
+down_revision: Union[str, None] = '5c0d2b7e91a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('email_id', sa.Uuid(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('recipient', sa.String(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('body', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), server_default=sa.text("'pending'"), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column(
+            'next_attempt_at', sa.DateTime(), server_default=sa.text("TIMEZONE ('utc', now())"), nullable=False
+        ),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column(
+            'created_at', sa.DateTime(), server_default=sa.text("TIMEZONE ('utc', now())"), nullable=False
+        ),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('email_id')
+    )
+    op.create_index(op.f('ix_email_outbox_user_id'), 'email_outbox', ['user_id'], unique=False)
+    op.create_index(
+        'ix_email_outbox_due',
+        'email_outbox',
+        ['next_attempt_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'sending')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_due', table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_user_id'), table_name='email_outbox')
+    op.drop_table('email_outbox')
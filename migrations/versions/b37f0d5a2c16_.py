@@ -0,0 +1,31 @@
+"""add email_outbox token_expires_at and resend_count
+
+Revision ID: b37f0d5a2c16
+Revises: 9e4a61c3d8b2
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b37f0d5a2c16'
+down_revision: Union[str, None] = '9e4a61c3d8b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('token_expires_at', sa.DateTime(), nullable=True))
+    op.add_column(
+        'email_outbox',
+        sa.Column('resend_count', sa.Integer(), server_default=sa.text('0'), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('email_outbox', 'resend_count')
+    op.drop_column('email_outbox', 'token_expires_at')
@@ -0,0 +1,71 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from src.dependencies import get_db_session, verify_admin_api_key
+from src.schemas.schemas import ImportReportSchema
+from src.services.importer import UserImporter, ImportFormat
+from src.services.metrics import metrics_registry
+
+admin_router: APIRouter = APIRouter(
+    prefix="/admin",
+    tags=["admin", ],
+    dependencies=[Depends(verify_admin_api_key), ],
+)
+
+
+@admin_router.post(path="/users/import", response_model=ImportReportSchema)
+async def import_users(
+        file: UploadFile,
+        import_format: Optional[ImportFormat] = None,
+        is_verified: bool = False,
+        db_session: AsyncSession = Depends(get_db_session),
+) -> ImportReportSchema:
+    """
+    Эндпоинт, отвечающий за массовый импорт пользователей из файла
+    в формате CSV (с заголовком name,surname,username,email,password)
+    или NDJSON (объекты с теми же полями)
+
+    Формат определяется параметром import_format, а если он не указан - по
+    расширению файла. Если формат определить не удалось или файл не в
+    кодировке UTF-8, возвращается исключение с кодом 400
+
+    Строки, не прошедшие валидацию или конфликтующие с существующими
+    пользователями, не прерывают импорт и перечисляются в отчете
+    """
+
+    if import_format is None:
+        extension: str = (file.filename or "").rsplit(".", 1)[-1].lower()
+        if extension not in UserImporter.PARSERS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown import format"
+            )
+        import_format = extension
+
+    try:
+        content: str = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be encoded in UTF-8"
+        )
+
+    return await UserImporter(db_session=db_session).import_content(
+        content=content,
+        import_format=import_format,
+        is_verified=is_verified,
+    )
+
+
+@admin_router.get(path="/metrics")
+async def get_metrics() -> dict:
+    """
+    Эндпоинт, возвращающий метрики процесса: состояние пулов соединений
+    с базой данных (выданные соединения, переполнение, время ожидания
+    соединения) и другие накопленные показатели
+    """
+
+    return metrics_registry.snapshot()
@@ -4,9 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette import status
 
-from src.database.models import User
-from src.schemas.schemas import TokenSchema
-from src.dependencies import get_user_service, get_current_user
+from src.schemas.schemas import TokenSchema, TokenClaimsSchema
+from src.dependencies import get_user_service, get_current_user_claims, throttle_login
 from src.services.service import UserService
 
 auth_router: APIRouter = APIRouter(
@@ -15,7 +14,11 @@ auth_router: APIRouter = APIRouter(
 )
 
 
-@auth_router.post(path="/login", response_model=TokenSchema)
+@auth_router.post(
+    path="/login",
+    response_model=TokenSchema,
+    dependencies=[Depends(throttle_login), ],
+)
 async def login(
     body: OAuth2PasswordRequestForm = Depends(),
     service: UserService = Depends(get_user_service),
@@ -29,6 +32,9 @@ async def login(
     Если пользователя с таким username не существует или
     пароль неверен, то возвращается исключение
 
+    Частота попыток входа ограничена для каждого username и
+    IP-адреса клиента; при превышении лимита возвращается код 429
+
     Если вход произошел успешно, то эндпоинт возвращает
     access token, который имеет короткий срок службы и должен
     присылаться в заголовках вместе с каждым запросом
@@ -54,16 +60,15 @@ async def login(
 
 @auth_router.post(path="/refresh-token", response_model=TokenSchema)
 async def refresh_token(
-    user: User = Depends(get_current_user),
-    service: UserService = Depends(get_user_service),
+    claims: TokenClaimsSchema = Depends(get_current_user_claims),
 ) -> TokenSchema:
     """
     Эндпоинт, который на основании refresh token'а, полученного
     из эндпоинта login возвращает новый access token. Данные
     о текущем пользователя берутся из заголовка запроса
-    (Authorization: Bearer <refresh token>)
+    (Authorization: Bearer <refresh token>) без обращения к базе данных
     """
 
-    token_data: Dict[str, str] = service.refresh_token(user=user)
+    token_data: Dict[str, str] = UserService.refresh_token(claims=claims)
 
     return TokenSchema(**token_data)
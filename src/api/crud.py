@@ -1,15 +1,16 @@
-from typing import List, Dict
+from typing import Dict, Optional, List, Any
 
-from aiosmtplib import SMTPRecipientsRefused, SMTPDataError
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from sqlalchemy.exc import IntegrityError
 from starlette import status
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
 from src.database.models import User
-from src.dependencies import get_user_service, get_current_user
-from src.schemas.schemas import ShowUserSchema, UserCreationSchema, UpdateUserSchema, ChangePasswordSchema, EmailSchema
+from src.dependencies import get_user_service, get_current_user, verify_admin_api_key
+from src.schemas.schemas import ShowUserSchema, UserCreationSchema, UpdateUserSchema, ChangePasswordSchema, EmailSchema, \
+    UsersPageSchema, BatchRegistrationItemSchema
 from src.services.service import UserService
+from src.settings import project_settings
 
 user_router: APIRouter = APIRouter(prefix="/user", tags=["user", ])
 
@@ -25,12 +26,11 @@ async def create_user(
     В случае, если пользователь с такими username или email уже
     существует, возвращается исключение с кодом 409
 
-    В случае, если не удалось отправить письмо для подтверждения регистрации,
-    возвращается исключение с кодом 422
-
     В случае успешной работы на указанную при регистрации почту отправляется
     письмо с токеном, который необходимо использовать в эндпоинте
-    verify_email для верификации созданного в базе данных пользователя
+    verify_email для верификации созданного в базе данных пользователя.
+    Письмо отправляется в фоне после фиксации транзакции, поэтому ответ
+    не ждет почтового сервера
     """
 
     try:
@@ -50,24 +50,88 @@ async def create_user(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this credentials already exists",
         )
-    except (SMTPRecipientsRefused, SMTPDataError):
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="Cannot send email"
-        )
 
 
-@user_router.get(path="/", response_model=List[ShowUserSchema])
+@user_router.post(path="/batch", response_model=List[BatchRegistrationItemSchema])
+async def create_users_batch(
+        body: List[Dict[str, Any]] = Body(
+            min_length=1,
+            max_length=project_settings.BATCH_REGISTRATION_MAX_SIZE,
+        ),
+        service: UserService = Depends(get_user_service)
+) -> List[BatchRegistrationItemSchema]:
+    """
+    Эндпоинт, отвечающий за пакетную регистрацию пользователей
+
+    На вход поступает список объектов с теми же полями, что и в эндпоинте
+    create_user. Каждый элемент обрабатывается независимо, и для каждого
+    в том же порядке возвращается статус: created, conflict (пользователь
+    с такими username или email уже существует) или invalid (элемент не прошел
+    валидацию)
+
+    Созданным пользователям на почту отправляется письмо с токеном для
+    эндпоинта verify_email. Письма отправляются в фоне после фиксации
+    транзакции, поэтому ответ не ждет почтового сервера
+    """
+
+    return await service.create_users_batch(items=body)
+
+
+@user_router.get(path="/", response_model=UsersPageSchema)
 async def get_users(
+        limit: int = Query(
+            default=project_settings.USERS_PAGE_DEFAULT_LIMIT,
+            ge=1,
+            le=project_settings.USERS_PAGE_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
         service: UserService = Depends(get_user_service)
-) -> List[User]:
+) -> UsersPageSchema:
     """
-    Эндпоинт, отвечающий за получение списка всех
+    Эндпоинт, отвечающий за постраничное получение списка
     верифицированных пользователей
+
+    Для получения следующей страницы в параметр cursor необходимо передать
+    значение next_cursor из предыдущего ответа. Если next_cursor пуст,
+    то страница последняя
+
+    В случае некорректного курсора возвращается исключение с кодом 400
+    """
+
+    try:
+        users, next_cursor = await service.get_users(limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    return UsersPageSchema(
+        items=[ShowUserSchema.model_validate(user) for user in users],
+        next_cursor=next_cursor,
+    )
+
+
+@user_router.get(path="/export", dependencies=[Depends(verify_admin_api_key), ])
+async def export_users() -> StreamingResponse:
     """
+    Эндпоинт, отвечающий за выгрузку всех верифицированных пользователей
+    в формате NDJSON (по одному JSON-объекту на строку)
 
-    users: List[User] = await service.get_users()
-    return users
+    Выгрузка удерживает соединение с базой данных на все время передачи,
+    поэтому, как и импорт, доступна только с ключом в заголовке
+    X-Admin-Api-Key; иначе возвращается исключение с кодом 403
+
+    Пользователи читаются из базы данных серверным курсором и отправляются
+    клиенту по мере чтения, поэтому потребление памяти не зависит от их количества
+    """
+
+    return StreamingResponse(
+        content=UserService.export_users(
+            batch_size=project_settings.USERS_EXPORT_BATCH_SIZE
+        ),
+        media_type="application/x-ndjson",
+    )
 
 
 @user_router.delete(path="/")
@@ -195,11 +259,8 @@ async def change_email(
     В случае, если пользователь уже использует этот адрес электронной
     почты, возникает исключение с кодом 409
 
-    Если письмо для подтверждения смены адреса электронной почты отправить
-    не удалось, возникает исключение с кодом 422
-
     В случае успешной работы пользователю на указанную почту
-    отправляется письмо с токеном, которой необходимо использовать
+    (в фоне, после фиксации транзакции) отправляется письмо с токеном, которой необходимо использовать
     в эндпоинте confirm_email_change, а в рамках ответа возвращается
     сообщение об успешной отправке
     """
@@ -216,9 +277,3 @@ async def change_email(
             status_code=status.HTTP_409_CONFLICT,
             detail="The user already uses this email",
         )
-
-    except (SMTPRecipientsRefused, SMTPDataError):
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="Cannot send email"
-        )
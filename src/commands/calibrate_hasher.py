@@ -0,0 +1,66 @@
+"""
+Команда подбора стоимости хеширования паролей под заданный бюджет
+времени входа на текущем оборудовании
+
+Запуск: python -m src.commands.calibrate_hasher [--min-rounds 10] [--max-rounds 14]
+        [--budget-ms 250] [--samples 5]
+
+Рекомендованное значение задается в переменной окружения PWD_ROUNDS.
+После этого хеши с другой стоимостью перехешируются при успешном входе
+"""
+import argparse
+import statistics
+import time
+from typing import List, Optional
+
+from passlib.context import CryptContext
+
+from src.services.hashing import build_pwd_context
+from src.settings import project_settings
+
+PASSWORD: str = "Calibration-Passw0rd!"
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Функция, возвращающая медианное время проверки пароля (в миллисекундах)"""
+
+    pwd_context: CryptContext = build_pwd_context(rounds=rounds)
+    hashed_password: str = pwd_context.hash(PASSWORD)
+
+    durations: List[float] = []
+    for _ in range(samples):
+        started_at: float = time.perf_counter()
+        pwd_context.verify(PASSWORD, hashed_password)
+        durations.append((time.perf_counter() - started_at) * 1000)
+
+    return statistics.median(durations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Password hashing cost calibration")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--budget-ms", type=float, default=250)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"scheme: {project_settings.PWD_SCHEMA}, current PWD_ROUNDS: {project_settings.PWD_ROUNDS}")
+
+    recommended: Optional[int] = None
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        duration: float = measure(rounds=rounds, samples=args.samples)
+        fits: bool = duration <= args.budget_ms
+        print(f"rounds={rounds:>2}: {duration:9.1f} ms{'' if fits else '  (over budget)'}")
+
+        if not fits:
+            break
+        recommended = rounds
+
+    if recommended is None:
+        print(f"no cost fits into {args.budget_ms} ms, use --min-rounds below {args.min_rounds}")
+    else:
+        print(f"recommended: PWD_ROUNDS={recommended}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Команда массового импорта пользователей из файла CSV или NDJSON
+
+Запуск: python -m src.commands.import_users users.csv [--format csv] [--verified]
+"""
+import argparse
+import asyncio
+import os
+
+from src.database.config import session_manager
+from src.schemas.schemas import ImportReportSchema
+from src.services.hashing import hashing_executor
+from src.services.importer import UserImporter
+from src.settings import project_settings
+
+
+async def import_users(path: str, import_format: str, is_verified: bool) -> ImportReportSchema:
+    with open(path, encoding="utf-8-sig") as file:
+        content: str = file.read()
+
+    session_manager.init()
+    hashing_executor.start(
+        kind=project_settings.HASHING_EXECUTOR,
+        workers=project_settings.HASHING_WORKERS,
+    )
+    try:
+        async with session_manager.async_session() as db_session, db_session.begin():
+            return await UserImporter(db_session=db_session).import_content(
+                content=content,
+                import_format=import_format,
+                is_verified=is_verified,
+            )
+    finally:
+        hashing_executor.shutdown()
+        await session_manager.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import of users")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(UserImporter.PARSERS), default=None)
+    parser.add_argument("--verified", action="store_true")
+    args = parser.parse_args()
+
+    import_format: str = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    if import_format not in UserImporter.PARSERS:
+        parser.error("cannot detect file format, use --format")
+
+    report: ImportReportSchema = asyncio.run(
+        import_users(path=args.path, import_format=import_format, is_verified=args.verified)
+    )
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 import os
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    async_sessionmaker,
+    AsyncEngine,
+    AsyncSession,
+)
+
+from src.database.instrumentation import instrument_queries
+from src.database.metrics import PoolMetrics, instrumented_pool_class, instrument_engine
+from src.database.routing import ReplicaSet, RoutingSession
 
 
 class DatabaseSettings(BaseSettings):
@@ -15,17 +25,56 @@ class DatabaseSettings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    DB_POOL_WAIT_WARNING_MS: int = 100
+
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_HEALTH_CHECK_INTERVAL: int = 5
+
     @property
     def ASYNC_DATABASE_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
-    @property
-    def _async_engine(self):
-        return create_async_engine(url=self.ASYNC_DATABASE_URL, future=True, echo=True)
+    def create_async_engine(
+            self,
+            url: Optional[str] = None,
+            name: str = "primary",
+    ) -> AsyncEngine:
+        """
+        Метод, создающий асинхронный движок с пулом соединений,
+        параметры которого берутся из настроек. По умолчанию движок
+        подключается к основной базе данных. Подготовленные asyncpg
+        выражения кэшируются в рамках каждого соединения пула
 
-    @property
-    def async_session(self):
-        return async_sessionmaker(self._async_engine, expire_on_commit=False)
+        Метрики пула публикуются под именем name
+        """
+
+        metrics: PoolMetrics = PoolMetrics(
+            name=name,
+            wait_warning_seconds=self.DB_POOL_WAIT_WARNING_MS / 1000,
+        )
+        engine: AsyncEngine = create_async_engine(
+            url=url or self.ASYNC_DATABASE_URL,
+            poolclass=instrumented_pool_class(metrics=metrics),
+            future=True,
+            echo=self.DB_ECHO,
+            pool_size=self.DB_POOL_SIZE,
+            max_overflow=self.DB_MAX_OVERFLOW,
+            pool_recycle=self.DB_POOL_RECYCLE,
+            pool_pre_ping=self.DB_POOL_PRE_PING,
+            connect_args={
+                "prepared_statement_cache_size": self.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            },
+        )
+        instrument_engine(engine=engine, metrics=metrics)
+        instrument_queries(engine=engine)
+
+        return engine
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(
@@ -39,4 +88,70 @@ class DatabaseSettings(BaseSettings):
     )
 
 
+class DatabaseSessionManager:
+    """
+    Класс, хранящий единственные в рамках процесса движок и фабрику сессий.
+    Движок создается при запуске приложения и освобождается при его остановке
+    """
+
+    def __init__(self, settings: DatabaseSettings):
+        self.settings: DatabaseSettings = settings
+        self._engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
+        self._replica_set: Optional[ReplicaSet] = None
+
+    def init(self) -> None:
+        """Метод, создающий движок и фабрику сессий (вызывается один раз на процесс)"""
+
+        if self._engine is not None:
+            return
+
+        self._engine = self.settings.create_async_engine()
+
+        if self.settings.DB_REPLICA_URLS:
+            self._replica_set = ReplicaSet(
+                engines=[
+                    self.settings.create_async_engine(url=url, name=f"replica-{index}")
+                    for index, url in enumerate(self.settings.DB_REPLICA_URLS)
+                ]
+            )
+            self._replica_set.start_health_checks(
+                interval=self.settings.DB_REPLICA_HEALTH_CHECK_INTERVAL
+            )
+
+        self._sessionmaker = async_sessionmaker(
+            self._engine,
+            expire_on_commit=False,
+            sync_session_class=RoutingSession,
+            replica_set=self._replica_set,
+        )
+
+    async def close(self) -> None:
+        """Метод, закрывающий все соединения пула и освобождающий движок"""
+
+        if self._engine is None:
+            return
+
+        if self._replica_set is not None:
+            await self._replica_set.close()
+            self._replica_set = None
+
+        await self._engine.dispose()
+        self._engine = None
+        self._sessionmaker = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            raise RuntimeError("Database engine is not initialized")
+        return self._engine
+
+    @property
+    def async_session(self) -> async_sessionmaker[AsyncSession]:
+        if self._sessionmaker is None:
+            raise RuntimeError("Database engine is not initialized")
+        return self._sessionmaker
+
+
 database_settings = DatabaseSettings()
+session_manager = DatabaseSessionManager(settings=database_settings)
@@ -0,0 +1,59 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+QUERY_STARTED_AT_ATTRIBUTE: str = "_query_started_at"
+
+
+@dataclass
+class QueryStats:
+    """Количество выполненных запросов и суммарное время их выполнения (в секундах)"""
+
+    count: int = 0
+    duration: float = 0.0
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _record_query(context) -> None:
+    started_at: Optional[float] = getattr(context, QUERY_STARTED_AT_ATTRIBUTE, None)
+    if started_at is None:
+        return
+    # повторный вызов для того же запроса (ошибка после after_cursor_execute) не учитывается
+    setattr(context, QUERY_STARTED_AT_ATTRIBUTE, None)
+
+    stats: Optional[QueryStats] = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started_at
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """
+    Функция, подписывающаяся на события выполнения запросов движком
+    и учитывающая каждый запрос в статистике текущего HTTP-запроса.
+    Запросы, завершившиеся ошибкой, также учитываются
+
+    Время начала хранится в контексте выполнения запроса, который
+    отбрасывается вместе с запросом, в том числе завершившимся ошибкой
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            setattr(context, QUERY_STARTED_AT_ATTRIBUTE, time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+        _record_query(context)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context) -> None:
+        _record_query(exception_context.execution_context)
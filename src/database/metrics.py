@@ -0,0 +1,129 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional, Type
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from src.services.metrics import metrics_registry, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# время установки новых соединений внутри текущего получения соединения из пула
+_connect_seconds: ContextVar[Optional[float]] = ContextVar("pool_connect_seconds", default=None)
+
+
+class PoolMetrics:
+    """
+    Класс, хранящий метрики одного пула соединений: количество выданных
+    соединений, созданных и инвалидированных соединений, время ожидания
+    свободного соединения и, отдельно, время установки новых соединений
+    """
+
+    def __init__(self, name: str, wait_warning_seconds: float):
+        self.name: str = name
+        self.wait_warning_seconds: float = wait_warning_seconds
+
+        labels: str = f'{{pool="{name}"}}'
+        self.checked_out: Gauge = metrics_registry.gauge(f"db_pool_checked_out{labels}")
+        self.connections_created: Counter = metrics_registry.counter(
+            f"db_pool_connections_created_total{labels}"
+        )
+        self.connections_invalidated: Counter = metrics_registry.counter(
+            f"db_pool_connections_invalidated_total{labels}"
+        )
+        self.wait_seconds: Histogram = metrics_registry.histogram(
+            f"db_pool_checkout_wait_seconds{labels}"
+        )
+        self.connect_seconds: Histogram = metrics_registry.histogram(
+            f"db_pool_connect_seconds{labels}"
+        )
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_seconds.observe(seconds)
+        if seconds > self.wait_warning_seconds:
+            logger.warning(
+                "Waited %.1f ms for a connection from pool %s",
+                seconds * 1000,
+                self.name,
+            )
+
+    def observe_connect(self, seconds: float) -> None:
+        self.connect_seconds.observe(seconds)
+        if seconds > self.wait_warning_seconds:
+            logger.warning(
+                "Spent %.1f ms connecting to the database for pool %s",
+                seconds * 1000,
+                self.name,
+            )
+
+
+def instrumented_pool_class(metrics: PoolMetrics) -> Type[AsyncAdaptedQueuePool]:
+    """
+    Функция, возвращающая класс пула, который измеряет время получения
+    соединения. Класс, а не экземпляр, передается в create_async_engine,
+    поэтому метрики сохраняются при пересоздании пула
+
+    Если для выдачи соединения пришлось установить новое, время установки
+    учитывается отдельно и не входит во время ожидания: медленное
+    подключение к базе данных не означает, что пул исчерпан
+    """
+
+    class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            started_at: float = time.perf_counter()
+            token = _connect_seconds.set(0.0)
+            try:
+                return super()._do_get()
+            finally:
+                connect_seconds: float = _connect_seconds.get()
+                _connect_seconds.reset(token)
+                metrics.observe_wait(time.perf_counter() - started_at - connect_seconds)
+
+        def _create_connection(self):
+            started_at: float = time.perf_counter()
+            try:
+                return super()._create_connection()
+            finally:
+                seconds: float = time.perf_counter() - started_at
+                metrics.observe_connect(seconds)
+                current: Optional[float] = _connect_seconds.get()
+                if current is not None:
+                    _connect_seconds.set(current + seconds)
+
+    return InstrumentedAsyncAdaptedQueuePool
+
+
+def instrument_engine(engine: AsyncEngine, metrics: PoolMetrics) -> None:
+    """
+    Функция, подписывающая метрики на события пула соединений движка
+    и регистрирующая показатели размера и переполнения пула
+    """
+
+    pool: Pool = engine.sync_engine.pool
+    labels: str = f'{{pool="{metrics.name}"}}'
+
+    metrics_registry.gauge_function(
+        f"db_pool_size{labels}", lambda: engine.sync_engine.pool.size()
+    )
+    metrics_registry.gauge_function(
+        f"db_pool_overflow{labels}", lambda: max(engine.sync_engine.pool.overflow(), 0)
+    )
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record) -> None:
+        metrics.connections_created.inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        metrics.checked_out.inc()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        metrics.checked_out.dec()
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        metrics.connections_invalidated.inc()
@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import text
+from sqlalchemy import text, Index, func, ForeignKey
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -25,6 +26,8 @@ class User(Base):
      обновляется автоматически при изменении записи.
     is_verified (bool): Статус верификации пользователя, по умолчанию False, после подтверждения адреса электронной
      почты устанавливается в True.
+    token_version (int): Версия токенов пользователя, записываемая в токены доступа. Увеличивается при смене пароля,
+     после чего выданные ранее токены перестают приниматься.
     """
 
     __tablename__ = "user"
@@ -43,6 +46,97 @@ class User(Base):
         onupdate=datetime.utcnow,
     )
     is_verified: Mapped[bool] = mapped_column(default=False)
+    token_version: Mapped[int] = mapped_column(default=0, server_default=text("0"))
 
     def __repr__(self) -> str:
         return f"User:{self.email}"
+
+
+class RevokedToken(Base):
+    """
+    Модель для представления отозванных токенов. Отзываются сразу все
+    токены пользователя с определенной версией токенов.
+
+    Атрибуты:
+    user_id (UUID): Идентификатор пользователя, токены которого отозваны. Не является внешним ключом, так как
+     запись должна пережить удаление пользователя.
+    token_version (int): Отозванная версия токенов пользователя.
+    expires_at (datetime): Момент, после которого все отозванные токены истекли и запись может быть удалена.
+    """
+
+    __tablename__ = "revoked_token"
+
+    user_id: Mapped[UUID] = mapped_column(primary_key=True)
+    token_version: Mapped[int] = mapped_column(primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+
+    def __repr__(self) -> str:
+        return f"RevokedToken:{self.user_id}:{self.token_version}"
+
+
+class EmailOutbox(Base):
+    """
+    Модель для представления писем, ожидающих отправки. Письмо записывается
+    в той же транзакции, что и изменение пользователя, и отправляется
+    фоновым обработчиком после ее фиксации.
+
+    Атрибуты:
+    email_id (UUID): Уникальный идентификатор письма, генерируется автоматически.
+    kind (str): Назначение письма (registration - подтверждение регистрации, email_change - подтверждение смены
+     электронной почты).
+    user_id (UUID): Идентификатор пользователя, которому адресовано письмо. Письма удаляются вместе с пользователем.
+    recipient (str): Адрес получателя.
+    subject (str): Тема письма.
+    body (str): Текст письма.
+    status (str): Состояние письма: pending - ожидает отправки, sending - захвачено обработчиком, sent - отправлено,
+     failed - не отправлено после всех попыток.
+    attempts (int): Количество сделанных попыток отправки.
+    next_attempt_at (datetime): Момент, не раньше которого будет сделана следующая попытка. Для захваченного письма -
+     момент окончания захвата: если обработчик не успел записать результат, после него письмо может быть захвачено
+     повторно.
+    last_error (str): Ошибка последней неудачной попытки.
+    created_at (datetime): Дата и время создания записи.
+    sent_at (datetime): Дата и время отправки письма.
+    token_expires_at (datetime): Момент истечения токена, содержащегося в письме.
+    resend_count (int): Сколько раз письмо было отправлено повторно вместо создания нового письма.
+    """
+
+    __tablename__ = "email_outbox"
+
+    email_id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    kind: Mapped[str]
+    user_id: Mapped[UUID] = mapped_column(ForeignKey("user.user_id", ondelete="CASCADE"), index=True)
+    recipient: Mapped[str]
+    subject: Mapped[str]
+    body: Mapped[str]
+    status: Mapped[str] = mapped_column(default="pending", server_default=text("'pending'"))
+    attempts: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        server_default=text("TIMEZONE ('utc', now())")
+    )
+    last_error: Mapped[Optional[str]]
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=text("TIMEZONE ('utc', now())")
+    )
+    sent_at: Mapped[Optional[datetime]]
+    token_expires_at: Mapped[Optional[datetime]]
+    resend_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+
+    def __repr__(self) -> str:
+        return f"EmailOutbox:{self.kind}:{self.recipient}"
+
+
+Index(
+    "ix_user_verified_created_at",
+    User.created_at,
+    User.user_id,
+    postgresql_where=User.is_verified,
+    postgresql_include=["name", "surname", "username", "email"],
+)
+Index("ix_user_updated_at", User.updated_at)
+Index("uq_user_email_lower", func.lower(User.email), unique=True)
+Index(
+    "ix_email_outbox_due",
+    EmailOutbox.next_attempt_at,
+    postgresql_where=EmailOutbox.status.in_(["pending", "sending"]),
+)
@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+READ_ONLY_KEY: str = "read_only"
+PRIMARY_KEY: str = "use_primary"
+WROTE_KEY: str = "wrote"
+
+
+class ReplicaSet:
+    """
+    Класс, представляющий собой набор реплик базы данных, между которыми
+    по кругу распределяются читающие запросы. Недоступные реплики
+    исключаются из ротации до следующей успешной проверки
+    """
+
+    def __init__(self, engines: List[AsyncEngine]):
+        self.engines: List[AsyncEngine] = engines
+        self._healthy: Set[int] = set(range(len(engines)))
+        self._counter: Iterator[int] = itertools.count()
+        self._health_check_task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Engine]:
+        """
+        Метод, возвращающий синхронный движок следующей доступной реплики
+        или None, если доступных реплик нет
+        """
+
+        for _ in range(len(self.engines)):
+            index: int = next(self._counter) % len(self.engines)
+            if index in self._healthy:
+                return self.engines[index].sync_engine
+        return None
+
+    async def check_health(self) -> None:
+        """Метод, проверяющий доступность каждой реплики запросом SELECT 1"""
+
+        for index, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            except Exception:
+                self._healthy.discard(index)
+            else:
+                self._healthy.add(index)
+
+    def start_health_checks(self, interval: float) -> None:
+        if self._health_check_task is None:
+            self._health_check_task = asyncio.create_task(
+                self._run_health_checks(interval=interval)
+            )
+
+    async def _run_health_checks(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+
+    async def close(self) -> None:
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            try:
+                await self._health_check_task
+            except asyncio.CancelledError:
+                pass
+            self._health_check_task = None
+
+        for engine in self.engines:
+            await engine.dispose()
+
+
+class RoutingSession(Session):
+    """
+    Сессия, отправляющая SELECT-запросы методов, помеченных как читающие,
+    на реплики. Все изменяющие запросы выполняются на основной базе данных,
+    после первого из них сессия до конца своей жизни читает только
+    с основной базы данных (чтение собственных записей)
+    """
+
+    def __init__(self, replica_set: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.replica_set: Optional[ReplicaSet] = replica_set
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info[WROTE_KEY] = True
+
+        elif (
+            self.replica_set is not None
+            and getattr(clause, "is_select", False)
+            and self.info.get(READ_ONLY_KEY)
+            and not self.info.get(PRIMARY_KEY)
+            and not self.info.get(WROTE_KEY)
+        ):
+            replica: Optional[Engine] = self.replica_set.choose()
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@contextmanager
+def use_replica(db_session: AsyncSession) -> Iterator[None]:
+    """Контекстный менеджер, разрешающий выполнять чтение на репликах"""
+
+    previous: bool = db_session.info.get(READ_ONLY_KEY, False)
+    db_session.info[READ_ONLY_KEY] = True
+    try:
+        yield
+    finally:
+        db_session.info[READ_ONLY_KEY] = previous
+
+
+@contextmanager
+def use_primary(db_session: AsyncSession) -> Iterator[None]:
+    """
+    Контекстный менеджер, принудительно направляющий все запросы
+    на основную базу данных (например, для чтения перед записью)
+    """
+
+    previous: bool = db_session.info.get(PRIMARY_KEY, False)
+    db_session.info[PRIMARY_KEY] = True
+    try:
+        yield
+    finally:
+        db_session.info[PRIMARY_KEY] = previous
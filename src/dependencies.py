@@ -1,30 +1,37 @@
+import secrets
 from typing import Optional
+from uuid import UUID
 
-from fastapi import HTTPException, Depends
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import HTTPException, Depends, Header, Request
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from src.services.security import get_email_from_jwt_token
-
-from src.database.config import database_settings
+from src.database.config import session_manager
 from src.database.models import User
+from src.services.cache import current_user_cache
+from src.schemas.schemas import TokenClaimsSchema
+from src.services.dal import UserDAL
+from src.services.rate_limit import client_ip_resolver, login_rate_limiter
+from src.services.revocation import revocation_service
+from src.services.security import get_claims_from_jwt_token
 from src.services.service import UserService
+from src.settings import project_settings
 
 
 async def get_db_session() -> AsyncSession:
     """
     Зависимость, возвращающая асинхронную сессию для работы с базой данных
     и закрывающая ее после окончания ее использования
+
+    На весь запрос открывается одна транзакция (unit of work): она фиксируется,
+    если запрос обработан успешно, и откатывается при возникновении исключения
     """
 
-    try:
-        session: AsyncSession = database_settings.async_session()
-        yield session
-    finally:
-        await session.close()
+    async with session_manager.async_session() as session:
+        async with session.begin():
+            yield session
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -35,51 +42,87 @@ credentials_exception = HTTPException(
 )
 
 
-async def get_current_user(
+async def get_current_user_claims(
     token: str = Depends(oauth2_scheme),
+) -> TokenClaimsSchema:
+    """
+    Зависимость, возвращающая данные о текущем пользователе из токена
+    доступа без обращения к базе данных. Используется эндпоинтами,
+    которым достаточно идентификатора и статуса верификации пользователя
+
+    Токены, отозванные при удалении пользователя или смене пароля,
+    отклоняются. Проверка отзыва сначала выполняется по фильтру Блума
+    в памяти, и к базе данных обращается только при возможном совпадении
+
+    В случае некорректного или отозванного токена или неверифицированного
+    пользователя возвращает исключение с кодом 401
+    """
+
+    try:
+        claims: TokenClaimsSchema = get_claims_from_jwt_token(token=token)
+    except JWTError:
+        raise credentials_exception
+
+    if not claims.is_verified:
+        raise credentials_exception
+
+    if await revocation_service.is_revoked(
+        user_id=claims.user_id, token_version=claims.token_version
+    ):
+        raise credentials_exception
+
+    return claims
+
+
+async def get_current_user(
+    claims: TokenClaimsSchema = Depends(get_current_user_claims),
     db_session: AsyncSession = Depends(get_db_session),
 ) -> User:
     """
-    Зависимость, возвращающая текущего пользователя,
-    используя данные из заголовков
+    Зависимость, возвращающая текущего пользователя, загружая его
+    по первичному ключу из токена доступа
+
+    Верифицированные пользователи кэшируются в процессе на
+    CURRENT_USER_CACHE_TTL_SECONDS, поэтому повторные запросы с тем же
+    токеном не обращаются к базе данных. Из кэша возвращается копия,
+    не связанная с сессией запроса
 
     В случае ошибок, связанных с токеном доступа или данным пользователя
+    (в том числе если версия токенов пользователя изменилась после выдачи токена)
     возвращает исключение с кодом 401
 
     В случае корректной работы возвращает текущего пользователя
     """
 
-    try:
-        email: Optional[str] = get_email_from_jwt_token(token=token)
-        if email is None:
+    user: Optional[User] = current_user_cache.get(user_id=claims.user_id)
+    if user is None:
+        user = await _get_user_by_id_from_database(
+            user_id=claims.user_id, db_session=db_session
+        )
+        if user is None:
+            raise credentials_exception
+        if not user.is_verified:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
 
-    user: Optional[User] = await _get_user_by_email_from_database(
-        email=email, db_session=db_session
-    )
-    if user is None:
-        raise credentials_exception
-    if not user.is_verified:
+        current_user_cache.set(user=user)
+
+    if user.token_version != claims.token_version:
         raise credentials_exception
 
     return user
 
 
-async def _get_user_by_email_from_database(
-        email: str,
+async def _get_user_by_id_from_database(
+        user_id: UUID,
         db_session: AsyncSession
 ) -> Optional[User]:
     """
     Вспомогательная функция, используемая зависимостью
-    get_current_user для получения пользователя из базы данных по его e-mail
+    get_current_user для получения пользователя из базы данных по его id.
+    Одновременные запросы одного пользователя выполняют один общий запрос
     """
 
-    async with db_session:
-        query = select(User).filter_by(email=email)
-        result = await db_session.execute(query)
-    return result.scalars().first()
+    return await UserDAL(db_session=db_session).get_user_by_id(user_id=user_id)
 
 
 def get_user_service(
@@ -91,3 +134,51 @@ def get_user_service(
     """
 
     return UserService(db_session=db_session)
+
+
+def verify_admin_api_key(
+        x_admin_api_key: Optional[str] = Header(default=None),
+) -> None:
+    """
+    Зависимость, разрешающая доступ к административным эндпоинтам
+    только при наличии корректного ключа в заголовке X-Admin-Api-Key
+
+    Если ключ не настроен или не совпадает, возвращает исключение с кодом 403
+    """
+
+    if project_settings.ADMIN_API_KEY is None or x_admin_api_key is None or not secrets.compare_digest(
+        x_admin_api_key, project_settings.ADMIN_API_KEY
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access denied"
+        )
+
+
+async def throttle_login(
+        request: Request,
+        body: OAuth2PasswordRequestForm = Depends(),
+) -> None:
+    """
+    Зависимость, ограничивающая частоту попыток входа по username
+    и IP-адресу клиента (за доверенными прокси из TRUSTED_PROXIES -
+    по заголовку X-Forwarded-For). Выполняется до проверки пароля, поэтому
+    отклоненные попытки не расходуют время процессора на bcrypt
+
+    Если лимит превышен, возвращает исключение с кодом 429 и
+    заголовком Retry-After
+    """
+
+    retry_after: Optional[int] = await login_rate_limiter.hit(
+        username=body.username,
+        client_ip=client_ip_resolver.resolve(
+            peer=request.client.host if request.client is not None else None,
+            forwarded_for=request.headers.get("X-Forwarded-For"),
+        ),
+    )
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(retry_after)},
+        )
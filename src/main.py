@@ -1,17 +1,58 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import uvicorn
 from fastapi import FastAPI, APIRouter
 
+from src.api.admin import admin_router
 from src.api.auth import auth_router
 from src.api.verification import verification_router
+from src.database.config import session_manager
+from src.middlewares import QueryStatsMiddleware
+from src.services.hashing import hashing_executor
+from src.services.outbox import email_outbox_worker
+from src.services.revocation import revocation_service
+from src.services.smtp_pool import smtp_pool
 from src.settings import project_settings
 from src.api.crud import user_router
 
-app: FastAPI = FastAPI(title=project_settings.APP_TITLE)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Жизненный цикл приложения: движок базы данных, пул соединений,
+    пул хеширования паролей, фоновое перестроение фильтра отозванных
+    токенов, пул соединений с почтовым сервером и обработчики очереди
+    писем создаются один раз на процесс и освобождаются при остановке
+    """
+
+    session_manager.init()
+    hashing_executor.start(
+        kind=project_settings.HASHING_EXECUTOR,
+        workers=project_settings.HASHING_WORKERS,
+        bulk_concurrency=project_settings.HASHING_BULK_CONCURRENCY,
+    )
+    await revocation_service.start(interval=project_settings.REVOCATION_REBUILD_INTERVAL_SECONDS)
+    smtp_pool.start()
+    email_outbox_worker.start(workers=project_settings.EMAIL_OUTBOX_WORKERS)
+    try:
+        yield
+    finally:
+        await email_outbox_worker.close()
+        await smtp_pool.close()
+        await revocation_service.close()
+        hashing_executor.shutdown()
+        await session_manager.close()
+
+
+app: FastAPI = FastAPI(title=project_settings.APP_TITLE, lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
 
 main_router: APIRouter = APIRouter(prefix="/api")
 main_router.include_router(user_router)
 main_router.include_router(auth_router)
 main_router.include_router(verification_router)
+main_router.include_router(admin_router)
 
 app.include_router(main_router)
 
@@ -0,0 +1,64 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from src.database.instrumentation import QueryStats, current_query_stats
+from src.services.metrics import metrics_registry
+from src.settings import project_settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware, подсчитывающий количество SQL-запросов и время их выполнения
+    для каждого HTTP-запроса
+
+    Итоги записываются в метрики в разрезе маршрутов, а в режиме отладки
+    также возвращаются в заголовках X-DB-Query-Count и X-DB-Time-Ms. Запросы,
+    превысившие QUERY_COUNT_BUDGET, отмечаются в журнале как возможные N+1
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats: QueryStats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and project_settings.DEBUG:
+                headers: MutableHeaders = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(stats.count))
+                headers.append("X-DB-Time-Ms", f"{stats.duration * 1000:.2f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_query_stats.reset(token)
+            self._record(scope=scope, stats=stats)
+
+    @staticmethod
+    def _record(scope: Scope, stats: QueryStats) -> None:
+        route = scope.get("route")
+        path: str = getattr(route, "path", "unmatched")
+        labels: str = f'{{method="{scope["method"]}",route="{path}"}}'
+
+        metrics_registry.counter(f"http_db_queries_total{labels}").inc(stats.count)
+        metrics_registry.histogram(f"http_db_time_seconds{labels}").observe(stats.duration)
+
+        if stats.count > project_settings.QUERY_COUNT_BUDGET:
+            metrics_registry.counter(f"http_db_query_budget_exceeded_total{labels}").inc()
+            logger.warning(
+                "%s %s executed %d queries (budget %d), possible N+1",
+                scope["method"],
+                path,
+                stats.count,
+                project_settings.QUERY_COUNT_BUDGET,
+            )
@@ -1,4 +1,5 @@
-from typing import Optional
+from typing import Optional, List, Literal
+from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, ConfigDict
 
@@ -49,6 +50,20 @@ class ShowUserSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UsersPageSchema(BaseModel):
+    """
+    Схема для отображения страницы списка пользователей.
+
+    Атрибуты:
+    items (List[ShowUserSchema]): Пользователи на текущей странице.
+    next_cursor (Optional[str]): Курсор для получения следующей страницы. Если страница последняя,
+    поле остается пустым.
+    """
+
+    items: List[ShowUserSchema]
+    next_cursor: Optional[str] = None
+
+
 class UpdateUserSchema(
     NameAndSurnameValidationMixin,
     UsernameValidationMixin,
@@ -98,6 +113,23 @@ class ChangePasswordSchema(
     password2: str
 
 
+class TokenClaimsSchema(BaseModel):
+    """
+    Схема для представления данных о пользователе, записанных в токен доступа.
+
+    Атрибуты:
+    user_id (UUID): Уникальный идентификатор пользователя.
+    is_verified (bool): Статус верификации пользователя на момент выдачи токена.
+    token_version (int): Версия токенов пользователя на момент выдачи токена.
+    """
+
+    user_id: UUID
+    is_verified: bool
+    token_version: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class TokenSchema(BaseModel):
     """
     Схема для представления access token'а и refresh token'а.
@@ -112,3 +144,52 @@ class TokenSchema(BaseModel):
     access_token: str
     refresh_token: Optional[str] = None
     token_type: str
+
+
+class ImportRowErrorSchema(BaseModel):
+    """
+    Схема для представления строки, которую не удалось импортировать.
+
+    Атрибуты:
+    row (int): Номер строки во входном файле.
+    email (Optional[str]): Электронная почта из строки, если она была указана.
+    status (str): "invalid", если строка не прошла валидацию, или "conflict", если пользователь
+    с таким email или username уже существует.
+    detail (str): Описание ошибки.
+    """
+
+    row: int
+    email: Optional[str] = None
+    status: Literal["invalid", "conflict"]
+    detail: str
+
+
+class ImportReportSchema(BaseModel):
+    """
+    Схема для представления результата импорта пользователей.
+
+    Атрибуты:
+    created (int): Количество созданных пользователей.
+    errors (List[ImportRowErrorSchema]): Строки, которые не удалось импортировать.
+    """
+
+    created: int
+    errors: List[ImportRowErrorSchema]
+
+
+class BatchRegistrationItemSchema(BaseModel):
+    """
+    Схема для представления результата регистрации одного пользователя из пакета.
+
+    Атрибуты:
+    index (int): Позиция элемента в пакете.
+    email (Optional[str]): Электронная почта из элемента, если она была указана.
+    status (str): "created", "conflict" (пользователь с таким email или username уже существует)
+    или "invalid" (элемент не прошел валидацию).
+    detail (Optional[str]): Описание ошибки.
+    """
+
+    index: int
+    email: Optional[str] = None
+    status: Literal["created", "conflict", "invalid"]
+    detail: Optional[str] = None
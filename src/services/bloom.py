@@ -0,0 +1,45 @@
+import hashlib
+import math
+from typing import Iterable, Iterator
+
+
+class BloomFilter:
+    """
+    Вероятностное множество строк. Проверка принадлежности не дает
+    ложноотрицательных ответов, а доля ложноположительных ответов при
+    заполнении до capacity элементов не превышает error_rate
+
+    Позиции битов вычисляются двойным хешированием одного дайджеста blake2b
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size: int = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count: int = max(1, round(self.size / capacity * math.log(2)))
+        self._bits: bytearray = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int, error_rate: float) -> "BloomFilter":
+        bloom_filter: BloomFilter = cls(capacity=capacity, error_rate=error_rate)
+        for item in items:
+            bloom_filter.add(item)
+        return bloom_filter
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest: bytes = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first: int = int.from_bytes(digest[:8], "little")
+        second: int = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
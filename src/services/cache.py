@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.services.dal import detached_copy
+from src.settings import project_settings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Ограниченный по размеру кэш, вытесняющий давно не использованные
+    записи (LRU) и удаляющий записи по истечении срока их жизни
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        item: Optional[Tuple[float, V]] = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Метод, сохраняющий значение на ttl секунд (по умолчанию - на время жизни кэша)"""
+
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class UserCache:
+    """
+    Кэш аутентифицированных пользователей процесса. Хранит отсоединенные
+    от сессий копии пользователей по user_id
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._users: TTLCache[UUID, User] = TTLCache(max_size=max_size, ttl=ttl)
+
+    def get(self, user_id: UUID) -> Optional[User]:
+        return self._users.get(user_id)
+
+    def set(self, user: User) -> None:
+        """
+        Метод, сохраняющий копию пользователя. Копия не связана с сессией
+        запроса, поэтому не меняется при откате или изменении его транзакции
+        """
+
+        self._users.set(user.user_id, detached_copy(user))
+
+    def invalidate(self, user_id: UUID, db_session: Optional[AsyncSession] = None) -> None:
+        """
+        Метод, удаляющий пользователя из кэша. Если передана сессия,
+        пользователь удаляется повторно после фиксации ее транзакции, чтобы
+        параллельный запрос не успел закэшировать незафиксированное состояние
+        """
+
+        self._users.pop(user_id)
+
+        if db_session is not None:
+            event.listen(
+                db_session.sync_session,
+                "after_commit",
+                lambda session: self._users.pop(user_id),
+                once=True,
+            )
+
+
+current_user_cache = UserCache(
+    max_size=project_settings.CURRENT_USER_CACHE_MAX_SIZE,
+    ttl=project_settings.CURRENT_USER_CACHE_TTL_SECONDS,
+)
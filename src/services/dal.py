@@ -1,16 +1,127 @@
-from typing import List, Optional, Dict
+import functools
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, ContextManager, Tuple, AsyncIterator, Sequence, Set
 from uuid import UUID
 
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete, lambda_stmt, tuple_, Row, text, or_, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
-from src.database.models import User
+from src.database.models import User, RevokedToken, EmailOutbox
+from src.database.routing import use_replica, use_primary, PRIMARY_KEY, WROTE_KEY
+from src.services.single_flight import SingleFlight
+
+
+def select_user_by_email(email: str) -> StatementLambdaElement:
+    """
+    Функции select_user_by_* возвращают lambda-запросы: конструкция запроса
+    строится и компилируется один раз, а при последующих вызовах меняется
+    лишь значение связанного параметра
+
+    Поиск по email не зависит от регистра и использует индекс uq_user_email_lower
+    """
+
+    normalized_email: str = email.lower()
+    return lambda_stmt(
+        lambda: select(User).where(func.lower(User.email) == normalized_email)
+    )
+
+
+def select_user_by_username(username: str) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(User).where(User.username == username))
+
+
+def select_user_by_id(user_id: UUID) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(User).where(User.user_id == user_id))
+
+
+USER_PROFILE_COLUMNS: Tuple = (User.name, User.surname, User.username, User.email)
+
+
+def replica_read(method):
+    """
+    Декоратор, помечающий метод DAL как только читающий: его запросы
+    могут быть выполнены на реплике базы данных
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self: "UserDAL", *args, **kwargs):
+        with use_replica(self.db_session):
+            return await method(self, *args, **kwargs)
+
+    return wrapper
+
+
+_user_lookups: SingleFlight[Tuple, Optional[User]] = SingleFlight(name="user_lookup")
+
+
+def detached_copy(user: Optional[User]) -> Optional[User]:
+    """
+    Функция, возвращающая копию пользователя, не связанную ни с одной
+    сессией. Копию можно присоединить к любой сессии через merge(load=False)
+    без запроса к базе данных
+    """
+
+    if user is None:
+        return None
+
+    copy: User = User(**{
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+    })
+    make_transient_to_detached(copy)
+    return copy
+
+
+def coalesced_read(method):
+    """
+    Декоратор для читающих методов DAL, возвращающих одного пользователя.
+    Одновременные вызовы метода с одинаковыми аргументами из разных
+    запросов выполняют один общий запрос к базе данных
+
+    Общий запрос выполняет первый вызвавший в своей сессии, а остальные
+    получают копию пользователя, присоединенную к своим сессиям без
+    дополнительных запросов. Чтения с основной базы данных объединяются
+    только между собой; если сессия уже изменяла данные, запрос выполняется
+    в ней без объединения, чтобы не нарушить чтение собственных записей
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self: "UserDAL", *args, **kwargs):
+        if self.db_session.info.get(WROTE_KEY):
+            return await method(self, *args, **kwargs)
+
+        leader: bool = False
+
+        async def load() -> Optional[User]:
+            nonlocal leader
+            leader = True
+            return await method(self, *args, **kwargs)
+
+        user: Optional[User] = await _user_lookups.do(
+            key=(
+                method.__name__,
+                bool(self.db_session.info.get(PRIMARY_KEY)),
+                args,
+                tuple(sorted(kwargs.items())),
+            ),
+            function=load,
+            share=detached_copy,
+        )
+        if leader or user is None:
+            return user
+        return await self.db_session.merge(user, load=False)
+
+    return wrapper
 
 
 class UserDAL:
     """
     Класс, через который осуществляется взаимодействие с информацией о пользователе, находящейся
-    в базе данных
+    в базе данных. Методы класса не управляют транзакциями сами, а выполняются в рамках
+    транзакции, открытой владельцем сессии (для запросов - зависимостью get_db_session)
     """
 
     def __init__(self, db_session: AsyncSession):
@@ -21,10 +132,19 @@ class UserDAL:
 
         self.db_session: AsyncSession = db_session
 
+    def on_primary(self) -> ContextManager[None]:
+        """
+        Метод, возвращающий контекстный менеджер, внутри которого все запросы
+        выполняются на основной базе данных (чтение перед записью и после нее)
+        """
+
+        return use_primary(self.db_session)
+
+    @coalesced_read
+    @replica_read
     async def get_user_by_email(self, email: str) -> User:
-        async with self.db_session.begin():
-            query = select(User).filter_by(email=email)
-            result = await self.db_session.execute(query)
+        query = select_user_by_email(email=email)
+        result = await self.db_session.execute(query)
         return result.scalars().first()
 
     async def update_user_data(
@@ -33,25 +153,21 @@ class UserDAL:
             surname: str,
             username: str,
             password: str,
-            user: User,
-    ) -> None:
-        async with self.db_session.begin():
-            if username != user.username:
-                setattr(user, "username", username)
-
-            if name != user.name:
-                setattr(user, "name", name)
-
-            if surname != user.surname:
-                setattr(user, "surname", username)
-
-            if password != user.hashed_password:
-                setattr(user, "hashed_password", password)
+            user_id: UUID,
+    ) -> Optional[User]:
+        return await self._update_returning(
+            user_id=user_id,
+            name=name,
+            surname=surname,
+            username=username,
+            hashed_password=password,
+        )
 
+    @coalesced_read
+    @replica_read
     async def get_user_by_id(self, user_id: UUID) -> User:
-        async with self.db_session.begin():
-            query = select(User).filter_by(user_id=user_id)
-            result = await self.db_session.execute(query)
+        query = select_user_by_id(user_id=user_id)
+        result = await self.db_session.execute(query)
         return result.scalars().first()
 
     async def create_new_user(
@@ -62,39 +178,161 @@ class UserDAL:
             email: str,
             hashed_password: str
     ) -> User:
-        async with self.db_session.begin():
-            new_user: User = User(
-                name=name,
-                surname=surname,
-                username=username,
-                email=email,
-                hashed_password=hashed_password
-            )
-            self.db_session.add(new_user)
-            await self.db_session.flush()
+        new_user: User = User(
+            name=name,
+            surname=surname,
+            username=username,
+            email=email,
+            hashed_password=hashed_password
+        )
+        self.db_session.add(new_user)
+        await self.db_session.flush()
 
         return new_user
 
-    async def verify_user(self, user: User) -> None:
-        if not user.is_verified:
-            async with self.db_session.begin():
-                setattr(user, "is_verified", True)
+    async def get_taken_emails_and_usernames(
+            self,
+            emails: List[str],
+            usernames: List[str],
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Метод, одним запросом находящий, какие из переданных адресов электронной
+        почты и username уже заняты существующими пользователями. Адреса
+        электронной почты возвращаются в нижнем регистре
+        """
 
-    async def get_users(self) -> List[User]:
-        async with self.db_session.begin():
-            query = select(User).filter_by(is_verified=True)
-            result = await self.db_session.execute(query)
+        query = select(User.email, User.username).where(
+            or_(
+                func.lower(User.email).in_([email.lower() for email in emails]),
+                User.username.in_(usernames),
+            )
+        )
+        result = await self.db_session.execute(query)
 
-        return result.scalars().all()
+        rows: Sequence[Row] = result.all()
+        return {row.email.lower() for row in rows}, {row.username for row in rows}
+
+    async def create_new_users(self, users_data: List[Dict[str, str]]) -> List[User]:
+        """
+        Метод, создающий пользователей одним многострочным INSERT ... RETURNING.
+        Строки, конфликтующие с уже существующими пользователями, пропускаются
+        """
+
+        query = (
+            insert(User).
+            values(users_data).
+            on_conflict_do_nothing().
+            returning(User)
+        )
+        result = await self.db_session.execute(query)
+
+        return list(result.scalars().all())
+
+    async def bulk_create_users(
+            self,
+            records: List[Tuple[UUID, str, str, str, str, str, bool]],
+    ) -> Set[UUID]:
+        """
+        Метод, загружающий пользователей через COPY во временную таблицу и
+        переносящий их в таблицу user одним запросом. Записи, конфликтующие
+        с существующими (или друг с другом) по email или username, пропускаются
+
+        Записи передаются в порядке столбцов
+        (user_id, name, surname, username, email, hashed_password, is_verified)
+
+        Возвращает множество идентификаторов созданных пользователей
+
+        COPY и перенос записей выполняются напрямую через соединение asyncpg,
+        минуя события SQLAlchemy, поэтому эти запросы не попадают в счетчик
+        запросов и время выполнения запросов (src.database.instrumentation)
+        """
+
+        columns: Tuple[str, ...] = (
+            "user_id", "name", "surname", "username",
+            "email", "hashed_password", "is_verified",
+        )
+        column_list: str = ", ".join(columns)
+
+        connection = await self.db_session.connection()
+        await connection.execute(text(
+            'CREATE TEMPORARY TABLE user_import (LIKE "user" INCLUDING DEFAULTS) ON COMMIT DROP'
+        ))
+
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        await driver_connection.copy_records_to_table(
+            "user_import", records=records, columns=columns
+        )
+        inserted = await driver_connection.fetch(
+            f'INSERT INTO "user" ({column_list}) '
+            f"SELECT {column_list} FROM user_import "
+            f"ON CONFLICT DO NOTHING RETURNING user_id"
+        )
+
+        return {row["user_id"] for row in inserted}
+
+    async def verify_user(self, user_id: UUID) -> Optional[User]:
+        return await self._update_returning(user_id=user_id, is_verified=True)
+
+    @replica_read
+    async def get_users(
+            self,
+            limit: int,
+            after: Optional[Tuple[datetime, UUID]] = None,
+    ) -> Sequence[Row]:
+        """
+        Метод, возвращающий страницу верифицированных пользователей,
+        упорядоченных по (created_at, user_id) и следующих за позицией after
+
+        Выбираются лишь отображаемые столбцы и столбцы курсора: строки
+        не создают объектов ORM и не попадают в identity map сессии
+        """
+
+        query = (
+            select(*USER_PROFILE_COLUMNS, User.created_at, User.user_id).
+            filter_by(is_verified=True).
+            order_by(User.created_at, User.user_id).
+            limit(limit)
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(User.created_at, User.user_id) > tuple_(*after)
+            )
+        result = await self.db_session.execute(query)
+
+        return result.all()
+
+    async def stream_users(self, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        """
+        Метод, построчно читающий верифицированных пользователей серверным
+        курсором и отдающий их пачками по batch_size строк. Выбираются лишь
+        отображаемые столбцы, поэтому строки не попадают в identity map сессии
+        """
+
+        query = (
+            select(*USER_PROFILE_COLUMNS).
+            filter_by(is_verified=True).
+            order_by(User.created_at, User.user_id).
+            execution_options(yield_per=batch_size)
+        )
+
+        with use_replica(self.db_session):
+            result = await self.db_session.stream(query)
+            async for partition in result.partitions(batch_size):
+                yield partition
 
     async def delete_user(self, user: User) -> None:
-        async with self.db_session.begin():
-            await self.db_session.delete(user)
+        await self.db_session.execute(
+            delete(User).
+            filter_by(user_id=user.user_id).
+            execution_options(synchronize_session=False)
+        )
 
+    @coalesced_read
+    @replica_read
     async def get_user_by_username(self, username: str) -> Optional[User]:
-        async with self.db_session.begin():
-            query = select(User).filter_by(username=username)
-            result = await self.db_session.execute(query)
+        query = select_user_by_username(username=username)
+        result = await self.db_session.execute(query)
 
         return result.scalars().first()
 
@@ -102,36 +340,277 @@ class UserDAL:
             self,
             user: User,
             parameters_for_update: Dict[str, str]
-    ) -> None:
-        async with self.db_session.begin():
-            if (name := parameters_for_update.get("name", None)) is not None:
-                await self.db_session.execute(
-                    update(User).values(name=name).filter_by(user_id=user.user_id)
-                )
-            if (surname := parameters_for_update.get("surname", None)) is not None:
-                await self.db_session.execute(
-                    update(User).values(surname=surname).filter_by(user_id=user.user_id)
-                )
-            if (username := parameters_for_update.get("username", None)) is not None:
-                await self.db_session.execute(
-                    update(User).values(username=username).filter_by(user_id=user.user_id)
-                )
+    ) -> User:
+        return await self._update_returning(
+            user_id=user.user_id,
+            **parameters_for_update,
+        )
 
     async def change_password(self, user: User, new_password: str) -> User:
-        async with self.db_session.begin():
-            query = (
-                update(User).
-                filter_by(user_id=user.user_id).
-                values(hashed_password=new_password).
-                returning(User)
+        """
+        Метод, меняющий пароль пользователя и увеличивающий версию его токенов,
+        из-за чего выданные ранее токены доступа перестают приниматься
+        """
+
+        return await self._update_returning(
+            user_id=user.user_id,
+            hashed_password=new_password,
+            token_version=User.token_version + 1,
+        )
+
+    async def replace_password_hash(
+            self,
+            user_id: UUID,
+            old_hashed_password: str,
+            new_hashed_password: str,
+    ) -> None:
+        """
+        Метод, заменяющий хеш пароля, только если он не был изменен
+        с момента чтения (например, сменой пароля в параллельном запросе)
+        """
+
+        await self.db_session.execute(
+            update(User).
+            filter_by(user_id=user_id, hashed_password=old_hashed_password).
+            values(hashed_password=new_hashed_password).
+            execution_options(synchronize_session=False)
+        )
+
+    async def change_email(self, user_id: UUID, new_email: str) -> Optional[User]:
+        """
+        Метод, меняющий адрес электронной почты верифицированного пользователя.
+        Если пользователь не найден или не верифицирован, возвращает None
+        """
+
+        return await self._update_returning(
+            user_id=user_id,
+            only_verified=True,
+            email=new_email,
+        )
+
+    async def _update_returning(
+            self,
+            user_id: UUID,
+            only_verified: bool = False,
+            **values,
+    ) -> Optional[User]:
+        """
+        Вспомогательный метод, изменяющий пользователя одним запросом
+        UPDATE ... RETURNING и возвращающий его обновленную запись
+        """
+
+        query = (
+            update(User).
+            filter_by(user_id=user_id).
+            values(**values).
+            returning(User).
+            execution_options(populate_existing=True)
+        )
+        if only_verified:
+            query = query.filter_by(is_verified=True)
+
+        result = await self.db_session.execute(query)
+        return result.scalars().first()
+
+
+class RevokedTokenDAL:
+    """
+    Класс, через который осуществляется взаимодействие с хранилищем отозванных
+    токенов. Как и UserDAL, не управляет транзакциями сам
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self.db_session: AsyncSession = db_session
+
+    async def revoke(self, user_id: UUID, token_version: int, expires_at: datetime) -> None:
+        await self.db_session.execute(
+            insert(RevokedToken).
+            values(user_id=user_id, token_version=token_version, expires_at=expires_at).
+            on_conflict_do_update(
+                index_elements=[RevokedToken.user_id, RevokedToken.token_version],
+                set_={"expires_at": expires_at},
             )
+        )
+
+    async def is_revoked(self, user_id: UUID, token_version: int) -> bool:
+        result = await self.db_session.execute(
+            select(RevokedToken.user_id).
+            filter_by(user_id=user_id, token_version=token_version).
+            filter(RevokedToken.expires_at > datetime.utcnow())
+        )
+        return result.first() is not None
+
+    async def get_active(self) -> Sequence[Row]:
+        """Метод, возвращающий пары (user_id, token_version) еще не истекших отзывов"""
 
-            result = await self.db_session.execute(query)
+        result = await self.db_session.execute(
+            select(RevokedToken.user_id, RevokedToken.token_version).
+            filter(RevokedToken.expires_at > datetime.utcnow())
+        )
+        return result.all()
 
+    async def delete_expired(self) -> None:
+        await self.db_session.execute(
+            delete(RevokedToken).
+            filter(RevokedToken.expires_at <= datetime.utcnow()).
+            execution_options(synchronize_session=False)
+        )
+
+
+class EmailOutboxDAL:
+    """
+    Класс, через который осуществляется взаимодействие с очередью писем.
+    Как и UserDAL, не управляет транзакциями сам
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self.db_session: AsyncSession = db_session
+
+    def enqueue(
+            self,
+            kind: str,
+            user_id: UUID,
+            recipient: str,
+            subject: str,
+            body: str,
+            token_expires_at: Optional[datetime] = None,
+    ) -> EmailOutbox:
+        """
+        Метод, добавляющий письмо в очередь. Письмо записывается в базу
+        данных вместе с остальными изменениями транзакции сессии
+        """
+
+        email: EmailOutbox = EmailOutbox(
+            kind=kind,
+            user_id=user_id,
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            token_expires_at=token_expires_at,
+        )
+        self.db_session.add(email)
+
+        return email
+
+    async def get_latest(
+            self,
+            kind: str,
+            user_id: UUID,
+            recipient: str,
+            created_after: datetime,
+    ) -> Optional[EmailOutbox]:
+        """
+        Метод, возвращающий последнее письмо данного назначения, адресованное
+        получателю после created_after, и блокирующий его до конца транзакции,
+        чтобы параллельные запросы не отправили его повторно одновременно
+        """
+
+        with use_primary(self.db_session):
+            result = await self.db_session.execute(
+                select(EmailOutbox).
+                filter(
+                    EmailOutbox.kind == kind,
+                    EmailOutbox.user_id == user_id,
+                    EmailOutbox.recipient == recipient,
+                    EmailOutbox.created_at > created_after,
+                ).
+                order_by(EmailOutbox.created_at.desc()).
+                limit(1).
+                with_for_update()
+            )
         return result.scalars().first()
 
-    async def change_email(self, user: User, new_email: str) -> User:
-        async with self.db_session.begin():
-            setattr(user, "email", new_email)
+    async def resend(self, email: EmailOutbox) -> None:
+        """Метод, возвращающий уже отправленное письмо в очередь для повторной отправки"""
+
+        await self.db_session.execute(
+            update(EmailOutbox).
+            filter_by(email_id=email.email_id).
+            values(
+                status="pending",
+                attempts=0,
+                next_attempt_at=datetime.utcnow(),
+                last_error=None,
+                resend_count=EmailOutbox.resend_count + 1,
+            ).
+            execution_options(synchronize_session=False)
+        )
+
+    async def claim(self, limit: int, lease_seconds: float) -> Sequence[EmailOutbox]:
+        """
+        Метод, захватывающий до limit писем, ожидающих отправки, в том числе
+        писем, захват которых истек. Строки, заблокированные другими
+        обработчиками, пропускаются (FOR UPDATE SKIP LOCKED)
+
+        Письма, токен в которых уже истек, не захватываются, а отмечаются
+        как неотправленные: ссылка в них все равно не сработает
+        """
+
+        now: datetime = datetime.utcnow()
+        await self.db_session.execute(
+            update(EmailOutbox).
+            filter(
+                EmailOutbox.status.in_(["pending", "sending"]),
+                EmailOutbox.next_attempt_at <= now,
+                EmailOutbox.token_expires_at <= now,
+            ).
+            values(status="failed", last_error="Token expired before the email was sent").
+            execution_options(synchronize_session=False)
+        )
+        due = (
+            select(EmailOutbox.email_id).
+            filter(
+                EmailOutbox.status.in_(["pending", "sending"]),
+                EmailOutbox.next_attempt_at <= now,
+            ).
+            order_by(EmailOutbox.next_attempt_at).
+            limit(limit).
+            with_for_update(skip_locked=True)
+        )
+        result = await self.db_session.execute(
+            update(EmailOutbox).
+            filter(EmailOutbox.email_id.in_(due)).
+            values(
+                status="sending",
+                attempts=EmailOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            ).
+            returning(EmailOutbox).
+            execution_options(synchronize_session=False)
+        )
+        return result.scalars().all()
+
+    async def mark_sent(self, email: EmailOutbox) -> None:
+        await self._finish(email=email, status="sent", sent_at=datetime.utcnow(), last_error=None)
+
+    async def mark_failed(
+            self,
+            email: EmailOutbox,
+            error: str,
+            next_attempt_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Метод, записывающий неудачную попытку отправки. Если задан момент
+        следующей попытки, письмо возвращается в очередь, иначе - отмечается
+        как неотправленное
+        """
+
+        if next_attempt_at is None:
+            await self._finish(email=email, status="failed", last_error=error)
+        else:
+            await self._finish(
+                email=email, status="pending", last_error=error, next_attempt_at=next_attempt_at
+            )
+
+    async def _finish(self, email: EmailOutbox, **values) -> None:
+        """
+        Вспомогательный метод, записывающий результат попытки, только если
+        письмо не было повторно захвачено после истечения захвата
+        """
 
-        return user
+        await self.db_session.execute(
+            update(EmailOutbox).
+            filter_by(email_id=email.email_id, status="sending", attempts=email.attempts).
+            values(**values).
+            execution_options(synchronize_session=False)
+        )
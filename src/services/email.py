@@ -1,73 +1,127 @@
 from datetime import datetime, timedelta
-from typing import List
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import List, Optional, Sequence
 from uuid import UUID
 
-from fastapi_mail import ConnectionConfig, MessageSchema, FastMail
 from jose import jwt
 from pydantic import EmailStr
 
 from src.database.models import User
+from src.services.smtp_pool import SMTPConnectionPool, smtp_pool
 from src.settings import project_settings
 
 
 class EmailService:
     """
-    Класс, предоставляющий приложению функционал для работы с электронной почтой
+    Класс, предоставляющий приложению функционал для работы с электронной почтой.
+    Письма отправляются через пул постоянных соединений с почтовым сервером
     """
 
-    def __init__(self):
+    def __init__(self, pool: SMTPConnectionPool = smtp_pool):
         """
-        Инициализация объекта класса путем конфигурации соединения с почтовым сервером
+        Инициализация объекта класса путем указания пула соединений с почтовым сервером
         """
 
-        self.email_conf: ConnectionConfig = ConnectionConfig(
-            MAIL_USERNAME=project_settings.MAIL_USERNAME,
-            MAIL_PASSWORD=project_settings.MAIL_PASSWORD,
-            MAIL_FROM=project_settings.MAIL_FROM,
-            MAIL_PORT=project_settings.MAIL_PORT,
-            MAIL_SERVER=project_settings.MAIL_SERVER,
-            MAIL_STARTTLS=project_settings.MAIL_STARTTLS,
-            MAIL_SSL_TLS=project_settings.MAIL_SSL_TLS,
-            USE_CREDENTIALS=project_settings.USE_CREDENTIALS,
-            VALIDATE_CERTS=project_settings.VALIDATE_CERTS,
-        )
+        self.pool: SMTPConnectionPool = pool
 
-    async def send_email(
+    def build_confirmation_body(
         self,
-        email: List[EmailStr],
-        subject: str,
+        email: str,
         instance: User,
-    ) -> None:
+        expires_at: Optional[datetime] = None,
+    ) -> str:
+        """
+        Метод, формирующий текст письма с токеном для подтверждения
+        адреса электронной почты email пользователя instance. Если момент
+        истечения токена не передан, токен действует
+        MAIL_CONFIRMATION_TOKEN_EXPIRE_SECONDS
+        """
+
         token: str = self._create_token_for_email_confirmation(
             user_id=instance.user_id,
-            email=email[0],
-            instance=instance
+            email=email,
+            instance=instance,
+            expires_at=expires_at,
         )
 
-        message: MessageSchema = MessageSchema(
-            subject=subject,
-            recipients=email,
-            body=f"Токен для подтверждения электронной почты: {token}",
-            subtype="html",
+        return f"Токен для подтверждения электронной почты: {token}"
+
+    @staticmethod
+    def build_message(
+        recipients: List[EmailStr],
+        subject: str,
+        body: str,
+        message_id: Optional[str] = None,
+    ) -> EmailMessage:
+        """
+        Метод, собирающий письмо. Если идентификатор письма message_id не
+        передан, он генерируется; домен идентификатора берется из MAIL_FROM,
+        чтобы не определять имя хоста при каждом письме
+        """
+
+        domain: str = project_settings.MAIL_FROM.rpartition("@")[2]
+
+        message: EmailMessage = EmailMessage()
+        message["From"] = project_settings.MAIL_FROM
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message["Date"] = formatdate(localtime=True)
+        message["Message-ID"] = (
+            f"<{message_id}@{domain}>" if message_id is not None else make_msgid(domain=domain)
         )
+        message.set_content(body, subtype="html")
 
-        fm: FastMail = FastMail(self.email_conf)
+        return message
 
-        await fm.send_message(message=message)
+    async def send_messages(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        Метод, отправляющий несколько писем, используя одно соединение
+        для нескольких писем. Возвращает для каждого письма исключение,
+        если его отправить не удалось, или None
+        """
+
+        return await self.pool.send_messages(messages)
+
+    async def send_message(
+        self,
+        recipients: List[EmailStr],
+        subject: str,
+        body: str,
+    ) -> None:
+        """Метод, отправляющий готовое письмо через почтовый сервер"""
+
+        error: Optional[Exception] = (await self.send_messages([
+            self.build_message(recipients=recipients, subject=subject, body=body),
+        ]))[0]
+        if error is not None:
+            raise error
+
+    async def send_email(
+        self,
+        email: List[EmailStr],
+        subject: str,
+        instance: User,
+    ) -> None:
+        await self.send_message(
+            recipients=email,
+            subject=subject,
+            body=self.build_confirmation_body(email=email[0], instance=instance),
+        )
 
     @staticmethod
     def _create_token_for_email_confirmation(
             user_id: UUID,
             email: str,
-            instance: User
+            instance: User,
+            expires_at: Optional[datetime] = None,
     ) -> str:
         """
         Метод, создающий токен для подтверждения электронной почты. В случае, если происходит ее смена,
         помимо id пользователя в токен записывается новый адрес электронной почты
         """
 
-        current_time: datetime = datetime.utcnow()
-        expiration_time: datetime = current_time + timedelta(
+        expiration_time: datetime = expires_at or datetime.utcnow() + timedelta(
             seconds=project_settings.MAIL_CONFIRMATION_TOKEN_EXPIRE_SECONDS
         )
 
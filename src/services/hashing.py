@@ -1,25 +1,205 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, TypeVar
+
 from passlib.context import CryptContext
 
 from src.settings import project_settings
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_pwd_context: Optional[CryptContext] = None
+
+
+def build_pwd_context(rounds: Optional[int] = None) -> CryptContext:
+    """
+    Функция, создающая контекст хеширования из настроек. Если задана
+    стоимость rounds, хеши с любой другой стоимостью считаются устаревшими
+    и подлежат перехешированию
+    """
+
+    options: dict = {}
+    if rounds is not None:
+        scheme: str = project_settings.PWD_SCHEMA
+        options = {
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        }
+
+    return CryptContext(
+        schemes=[project_settings.PWD_SCHEMA, ],
+        deprecated=project_settings.PWD_DEPRECATED,
+        **options,
+    )
+
+
+def _get_pwd_context() -> CryptContext:
+    """
+    Функция, возвращающая контекст хеширования текущего процесса.
+    Контекст создается один раз в каждом процессе пула
+    """
+
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = build_pwd_context(rounds=project_settings.PWD_ROUNDS)
+    return _pwd_context
+
+
+def _hash_password(password: str) -> str:
+    return _get_pwd_context().hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _get_pwd_context().verify(plain_password, hashed_password)
+
+
+class HashingExecutor:
+    """
+    Класс, управляющий пулом, в котором выполняется хеширование паролей,
+    чтобы вычисление bcrypt не блокировало цикл событий
+
+    По умолчанию используется пул процессов. Если его не удается создать
+    или он перестает работать, хеширование переводится в пул потоков
+    (bcrypt освобождает GIL, поэтому потоки также выполняются параллельно)
+
+    Процессы пула запускаются методом spawn: к моменту запуска в процессе
+    приложения уже работают цикл событий и потоки, копировать которые
+    через fork небезопасно
+
+    Пакетное хеширование (run_bulk) занимает не более bulk_concurrency
+    исполнителей одновременно, чтобы регистрация и импорт большого
+    количества пользователей не задерживали вход остальных
+    """
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self._workers: Optional[int] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._bulk_concurrency: Optional[int] = None
+        self._bulk_semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self, kind: str, workers: Optional[int] = None, bulk_concurrency: Optional[int] = None) -> None:
+        if self._executor is not None:
+            return
+
+        self._workers = workers
+        self._bulk_concurrency = bulk_concurrency
+        self._bulk_semaphore = asyncio.Semaphore(bulk_concurrency) if bulk_concurrency else None
+        if kind == "process":
+            try:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_get_pwd_context,
+                )
+            except (OSError, ImportError, NotImplementedError):
+                logger.warning("Cannot start hashing process pool, falling back to threads")
+
+        if self._executor is None:
+            self._start_thread_pool()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        """
+        Метод, выполняющий функцию в пуле. Если пул не был запущен
+        (например, в командах вне приложения), используется пул потоков
+        цикла событий по умолчанию
+        """
+
+        loop = asyncio.get_running_loop()
+        executor: Optional[Executor] = self._executor
+        try:
+            return await loop.run_in_executor(executor, function, *args)
+        except BrokenProcessPool:
+            self._replace_broken_executor(executor)
+            return await loop.run_in_executor(self._executor, function, *args)
+
+    async def run_bulk(self, function: Callable[..., T], arguments: List[tuple]) -> List[T]:
+        """
+        Метод, выполняющий функцию в пуле для каждого набора аргументов
+        и возвращающий результаты в том же порядке. Одновременно выполняется
+        не более bulk_concurrency вызовов (без ограничения, если оно не задано)
+        """
+
+        semaphore: Optional[asyncio.Semaphore] = self._bulk_semaphore
+
+        async def run_one(args: tuple) -> T:
+            if semaphore is None:
+                return await self.run(function, *args)
+            async with semaphore:
+                return await self.run(function, *args)
+
+        return list(await asyncio.gather(*(run_one(args) for args in arguments)))
+
+    def _replace_broken_executor(self, broken: Optional[Executor]) -> None:
+        """
+        Вспомогательный метод, переводящий хеширование в пул потоков.
+        Пул заменяется только один раз, даже если о его поломке узнали
+        несколько одновременно выполнявшихся вызовов
+        """
+
+        with self._lock:
+            if self._executor is not broken:
+                return
+            logger.warning("Hashing process pool is broken, falling back to threads")
+            if broken is not None:
+                broken.shutdown(wait=False, cancel_futures=True)
+            self._start_thread_pool()
+
+    def _start_thread_pool(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._workers,
+            thread_name_prefix="hasher",
+        )
+
+
+hashing_executor = HashingExecutor()
+
 
 class Hasher:
     """
-    Класс для работы с хешированием паролей
+    Класс для работы с хешированием паролей. Хеширование и проверка
+    выполняются в пуле hashing_executor вне цикла событий
     """
 
     def __init__(self):
         """Инициализация объекта класса путем конфигурации метода хеширования"""
 
-        self.pwd_context: CryptContext = CryptContext(
-            schemes=[project_settings.PWD_SCHEMA, ],
-            deprecated=project_settings.PWD_DEPRECATED,
-        )
+        self.pwd_context: CryptContext = _get_pwd_context()
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Метод, проверяющий, совпадает ли 'сырой' пароль с уже хэшированным"""
 
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await hashing_executor.run(_verify_password, plain_password, hashed_password)
+
+    async def get_password_hash(self, password: str) -> str:
+        return await hashing_executor.run(_hash_password, password)
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """
+        Метод, проверяющий, создан ли хеш устаревшей схемой или с другой
+        стоимостью. Проверка лишь разбирает хеш и не вычисляет его
+        """
 
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+        return self.pwd_context.needs_update(hashed_password)
+
+    async def get_password_hashes(self, passwords: List[str]) -> List[str]:
+        """
+        Метод, параллельно хеширующий набор паролей. Набор хешируется
+        не более чем HASHING_BULK_CONCURRENCY исполнителями пула
+        """
+
+        return await hashing_executor.run_bulk(
+            _hash_password, [(password, ) for password in passwords]
+        )
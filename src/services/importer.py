@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+from typing import Any, Iterator, List, Literal, Set, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.schemas.schemas import UserCreationSchema, ImportReportSchema, ImportRowErrorSchema
+from src.services.dal import UserDAL
+from src.services.hashing import Hasher
+
+ImportFormat = Literal["csv", "ndjson"]
+
+
+def parse_csv(content: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Функция, разбирающая CSV с заголовком name,surname,username,email,password
+    и возвращающая пары (номер строки, данные строки)
+    """
+
+    reader = csv.DictReader(io.StringIO(content))
+    for data in reader:
+        yield reader.line_num, data
+
+
+def parse_ndjson(content: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Функция, разбирающая NDJSON (по одному JSON-объекту на строку)
+    и возвращающая пары (номер строки, данные строки). Для строк
+    с некорректным JSON вместо данных возвращается None
+    """
+
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+class UserImporter:
+    """
+    Класс, реализующий массовый импорт пользователей: валидацию строк,
+    параллельное хеширование паролей и загрузку в базу данных через COPY
+    """
+
+    PARSERS = {
+        "csv": parse_csv,
+        "ndjson": parse_ndjson,
+    }
+
+    def __init__(self, db_session: AsyncSession):
+        self.dal: UserDAL = UserDAL(db_session=db_session)
+        self.hasher: Hasher = Hasher()
+
+    async def import_content(
+            self,
+            content: str,
+            import_format: ImportFormat,
+            is_verified: bool = False,
+    ) -> ImportReportSchema:
+        """
+        Метод, импортирующий пользователей из содержимого файла
+        в формате CSV или NDJSON и возвращающий построчный отчет об ошибках
+        """
+
+        errors: List[ImportRowErrorSchema] = []
+        valid_rows: List[Tuple[int, UserCreationSchema]] = []
+
+        for row, data in self.PARSERS[import_format](content):
+            if not isinstance(data, dict):
+                errors.append(ImportRowErrorSchema(
+                    row=row, status="invalid", detail="Malformed row"
+                ))
+                continue
+
+            try:
+                valid_rows.append((row, UserCreationSchema(
+                    name=data.get("name"),
+                    surname=data.get("surname"),
+                    username=data.get("username"),
+                    email=data.get("email"),
+                    password1=data.get("password"),
+                    password2=data.get("password"),
+                )))
+            except ValidationError as exc:
+                errors.append(ImportRowErrorSchema(
+                    row=row,
+                    email=data["email"] if isinstance(data.get("email"), str) else None,
+                    status="invalid",
+                    detail="; ".join(error["msg"] for error in exc.errors()),
+                ))
+
+        hashed_passwords: List[str] = await self.hasher.get_password_hashes(
+            [schema.password1 for _, schema in valid_rows]
+        )
+        records: List[Tuple[UUID, str, str, str, str, str, bool]] = [
+            (uuid4(), schema.name, schema.surname, schema.username,
+             schema.email, hashed_password, is_verified)
+            for (_, schema), hashed_password in zip(valid_rows, hashed_passwords)
+        ]
+
+        created: Set[UUID] = set()
+        if records:
+            created = await self.dal.bulk_create_users(records=records)
+
+        for (row, schema), record in zip(valid_rows, records):
+            if record[0] not in created:
+                errors.append(ImportRowErrorSchema(
+                    row=row,
+                    email=schema.email,
+                    status="conflict",
+                    detail="User with this email or username already exists",
+                ))
+
+        errors.sort(key=lambda error: error.row)
+        return ImportReportSchema(created=len(created), errors=errors)
@@ -0,0 +1,108 @@
+import bisect
+import threading
+from typing import Callable, Dict, List, Sequence
+
+DEFAULT_BUCKETS: Sequence[float] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class Counter:
+    """Монотонно возрастающий счетчик"""
+
+    def __init__(self):
+        self.value: float = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Показатель, значение которого может как расти, так и убывать"""
+
+    def __init__(self):
+        self.value: float = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин (в секундах) и
+    накопленными суммой и количеством наблюдений
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets: List[float] = sorted(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0
+        self.count: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative: int = 0
+        buckets: Dict[str, int] = {}
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+class MetricsRegistry:
+    """
+    Класс, хранящий метрики процесса. Метрики создаются по имени при
+    первом обращении, а функциональные показатели вычисляются при чтении
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Gauge] = {}
+        self.gauge_functions: Dict[str, Callable[[], float]] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        return self.counters.setdefault(name, Counter())
+
+    def gauge(self, name: str) -> Gauge:
+        return self.gauges.setdefault(name, Gauge())
+
+    def gauge_function(self, name: str, function: Callable[[], float]) -> None:
+        self.gauge_functions[name] = function
+
+    def histogram(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.histograms.setdefault(name, Histogram(buckets=buckets))
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": {name: counter.value for name, counter in self.counters.items()},
+            "gauges": {
+                **{name: gauge.value for name, gauge in self.gauges.items()},
+                **{name: function() for name, function in self.gauge_functions.items()},
+            },
+            "histograms": {
+                name: histogram.snapshot() for name, histogram in self.histograms.items()
+            },
+        }
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from aiosmtplib import SMTPRecipientsRefused
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.config import session_manager
+from src.database.models import EmailOutbox
+from src.services.dal import EmailOutboxDAL
+from src.services.email import EmailService
+from src.services.metrics import metrics_registry, Counter
+from src.settings import project_settings
+
+logger = logging.getLogger(__name__)
+
+PERMANENT_ERRORS = (SMTPRecipientsRefused, )
+WAKEUP_SCHEDULED_KEY: str = "outbox_wakeup_scheduled"
+
+
+class EmailOutboxWorker:
+    """
+    Класс, управляющий фоновыми обработчиками очереди писем. Каждый
+    обработчик захватывает пачку писем в короткой транзакции, отправляет
+    их вне транзакции (по несколько писем на одно соединение пула SMTP)
+    и записывает результат во второй короткой транзакции
+
+    Неудачные попытки повторяются с экспоненциально растущей задержкой,
+    пока не будет исчерпано EMAIL_OUTBOX_MAX_ATTEMPTS попыток. Отказ
+    почтового сервера принять получателя считается окончательным
+    """
+
+    def __init__(self):
+        self.email: EmailService = EmailService()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: asyncio.Event = asyncio.Event()
+
+        self.sent: Counter = metrics_registry.counter('email_outbox_total{result="sent"}')
+        self.retried: Counter = metrics_registry.counter('email_outbox_total{result="retried"}')
+        self.failed: Counter = metrics_registry.counter('email_outbox_total{result="failed"}')
+
+    def start(self, workers: int) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify_after_commit(self, db_session: AsyncSession) -> None:
+        """
+        Метод, будящий обработчики после фиксации транзакции сессии,
+        чтобы добавленные в ней письма не ждали следующего опроса очереди.
+        Повторные вызовы до фиксации не добавляют новых обработчиков события
+        """
+
+        if db_session.info.get(WAKEUP_SCHEDULED_KEY):
+            return
+        db_session.info[WAKEUP_SCHEDULED_KEY] = True
+
+        def wake_up(session) -> None:
+            session.info.pop(WAKEUP_SCHEDULED_KEY, None)
+            self._wakeup.set()
+
+        event.listen(db_session.sync_session, "after_commit", wake_up, once=True)
+
+    async def process_batch(self) -> int:
+        """Метод, обрабатывающий одну пачку писем и возвращающий ее размер"""
+
+        async with session_manager.async_session() as db_session, db_session.begin():
+            emails: Sequence[EmailOutbox] = await EmailOutboxDAL(db_session=db_session).claim(
+                limit=project_settings.EMAIL_OUTBOX_BATCH_SIZE,
+                lease_seconds=project_settings.EMAIL_OUTBOX_LEASE_SECONDS,
+            )
+        if not emails:
+            return 0
+
+        results: List[Optional[Exception]] = await self.email.send_messages([
+            self.email.build_message(
+                recipients=[email.recipient, ],
+                subject=email.subject,
+                body=email.body,
+                message_id=str(email.email_id),
+            )
+            for email in emails
+        ])
+
+        async with session_manager.async_session() as db_session, db_session.begin():
+            dal: EmailOutboxDAL = EmailOutboxDAL(db_session=db_session)
+            for email, error in zip(emails, results):
+                if error is None:
+                    await dal.mark_sent(email=email)
+                    self.sent.inc()
+                    continue
+
+                next_attempt_at: Optional[datetime] = self._next_attempt_at(email=email, error=error)
+                await dal.mark_failed(email=email, error=repr(error), next_attempt_at=next_attempt_at)
+                if next_attempt_at is None:
+                    self.failed.inc()
+                    logger.error("Cannot send email %s: %r", email.email_id, error)
+                else:
+                    self.retried.inc()
+
+        return len(emails)
+
+    @staticmethod
+    def _next_attempt_at(email: EmailOutbox, error: BaseException) -> Optional[datetime]:
+        """
+        Вспомогательный метод, возвращающий момент следующей попытки или None,
+        если попыток больше не будет. Попытка не назначается позже истечения
+        токена в письме: такое письмо уже бесполезно
+        """
+
+        if isinstance(error, PERMANENT_ERRORS) or email.attempts >= project_settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            return None
+
+        delay: float = min(
+            project_settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1),
+            project_settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS,
+        )
+        next_attempt_at: datetime = datetime.utcnow() + timedelta(seconds=delay)
+        if email.token_expires_at is not None and next_attempt_at >= email.token_expires_at:
+            return None
+        return next_attempt_at
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed: int = await self.process_batch()
+            except Exception:
+                logger.exception("Cannot process email outbox")
+                processed = 0
+
+            if processed < project_settings.EMAIL_OUTBOX_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        timeout=project_settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+
+email_outbox_worker = EmailOutboxWorker()
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, user_id: UUID) -> str:
+    """
+    Функция, кодирующая позицию последнего элемента страницы
+    (created_at, user_id) в непрозрачную для клиента строку
+    """
+
+    raw: bytes = json.dumps(
+        [created_at.isoformat(), str(user_id)],
+        separators=(",", ":"),
+    ).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Функция, восстанавливающая позицию (created_at, user_id) из курсора
+
+    В случае некорректного курсора возникает исключение ValueError. Время
+    с часовым поясом также считается некорректным: столбец created_at
+    хранит время без часового пояса, и сравнение с ним завершилось бы ошибкой
+    """
+
+    try:
+        raw: bytes = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, user_id = json.loads(raw)
+        created_at, user_id = datetime.fromisoformat(created_at), UUID(user_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+    if created_at.tzinfo is not None:
+        raise ValueError("Invalid cursor")
+    return created_at, user_id
@@ -0,0 +1,203 @@
+import ipaddress
+import math
+import time
+from typing import Dict, List, Optional, Protocol, Tuple, Union
+
+from src.settings import project_settings
+
+
+class RateLimiterBackend(Protocol):
+    """
+    Хранилище счетчиков ограничителя частоты. Метод increment увеличивает
+    счетчик текущего окна и возвращает пару (счетчик предыдущего окна,
+    счетчик текущего окна)
+    """
+
+    async def increment(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        ...
+
+
+class InMemoryRateLimiterBackend:
+    """
+    Хранилище счетчиков в памяти процесса. Для каждого ключа хранится
+    лишь номер текущего окна и два счетчика; устаревшие ключи периодически
+    удаляются
+    """
+
+    CLEANUP_INTERVAL: int = 1000
+
+    def __init__(self):
+        self._counters: Dict[str, Tuple[int, int, int]] = {}
+        self._operations: int = 0
+
+    async def increment(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        stored_window, previous, current = self._counters.get(key, (window, 0, 0))
+
+        if stored_window == window - 1:
+            previous, current = current, 0
+        elif stored_window != window:
+            previous, current = 0, 0
+
+        current += 1
+        self._counters[key] = (window, previous, current)
+
+        self._operations += 1
+        if self._operations % self.CLEANUP_INTERVAL == 0:
+            self._cleanup(window=window)
+
+        return previous, current
+
+    def _cleanup(self, window: int) -> None:
+        for key in [key for key, (stored_window, _, _) in self._counters.items() if stored_window < window - 1]:
+            del self._counters[key]
+
+
+class RedisRateLimiterBackend:
+    """
+    Общее для всех процессов хранилище счетчиков в Redis. Требует
+    установленного пакета redis; в тестах и при локальном запуске его
+    заменяет InMemoryRateLimiterBackend
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("The redis package is required for RATE_LIMIT_REDIS_URL") from exc
+
+        self._redis = redis.from_url(url)
+
+    async def increment(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        current_key: str = f"rate:{key}:{window}"
+        previous_key: str = f"rate:{key}:{window - 1}"
+
+        async with self._redis.pipeline(transaction=True) as pipeline:
+            pipeline.incr(current_key)
+            pipeline.expire(current_key, window_seconds * 2)
+            pipeline.get(previous_key)
+            current, _, previous = await pipeline.execute()
+
+        return int(previous or 0), int(current)
+
+
+class SlidingWindowRateLimiter:
+    """
+    Ограничитель частоты по скользящему окну. Количество событий за
+    последние window_seconds оценивается по счетчикам текущего и предыдущего
+    окон: счетчик предыдущего окна учитывается пропорционально той части,
+    которая еще попадает в скользящее окно
+    """
+
+    def __init__(self, backend: RateLimiterBackend, limit: int, window_seconds: int):
+        self.backend: RateLimiterBackend = backend
+        self.limit: int = limit
+        self.window_seconds: int = window_seconds
+
+    async def hit(self, key: str) -> Optional[int]:
+        """
+        Метод, учитывающий событие для ключа. Если лимит превышен, возвращает
+        количество секунд до того, как попытку можно будет повторить,
+        иначе - None
+        """
+
+        now: float = time.time()
+        window: int = int(now // self.window_seconds)
+        elapsed: float = now - window * self.window_seconds
+
+        previous, current = await self.backend.increment(
+            key=key, window=window, window_seconds=self.window_seconds
+        )
+        weight: float = 1 - elapsed / self.window_seconds
+        if previous * weight + current <= self.limit:
+            return None
+
+        return max(1, math.ceil(self.window_seconds - elapsed))
+
+
+def build_rate_limiter_backend() -> RateLimiterBackend:
+    """
+    Функция, создающая хранилище счетчиков: общее хранилище в Redis,
+    если задан RATE_LIMIT_REDIS_URL, иначе - хранилище в памяти процесса
+    """
+
+    if project_settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimiterBackend(url=project_settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryRateLimiterBackend()
+
+
+class LoginRateLimiter:
+    """
+    Класс, ограничивающий частоту попыток входа отдельно для каждого
+    username и для каждого IP-адреса клиента
+    """
+
+    def __init__(self, backend: RateLimiterBackend):
+        self.by_username = SlidingWindowRateLimiter(
+            backend=backend,
+            limit=project_settings.LOGIN_RATE_LIMIT_PER_USERNAME,
+            window_seconds=project_settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+        )
+        self.by_ip = SlidingWindowRateLimiter(
+            backend=backend,
+            limit=project_settings.LOGIN_RATE_LIMIT_PER_IP,
+            window_seconds=project_settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+        )
+
+    async def hit(self, username: str, client_ip: Optional[str]) -> Optional[int]:
+        """
+        Метод, учитывающий попытку входа. Возвращает количество секунд
+        до повторной попытки, если превышен хотя бы один из лимитов
+        """
+
+        retry_after: List[int] = []
+        for limiter, key in (
+            (self.by_username, f"login:username:{username.lower()}"),
+            (self.by_ip, f"login:ip:{client_ip}" if client_ip else None),
+        ):
+            if key is None:
+                continue
+            seconds: Optional[int] = await limiter.hit(key=key)
+            if seconds is not None:
+                retry_after.append(seconds)
+
+        return max(retry_after) if retry_after else None
+
+
+class ClientIPResolver:
+    """
+    Класс, определяющий IP-адрес клиента. Если приложение находится за
+    прокси-серверами, адрес соединения - это адрес прокси, поэтому для
+    запросов от доверенных прокси (trusted_proxies, адреса или подсети)
+    адрес клиента берется из заголовка X-Forwarded-For
+
+    Заголовок просматривается справа налево, и клиентом считается первый
+    адрес, не принадлежащий доверенным прокси: адреса левее него мог
+    подставить сам клиент
+    """
+
+    def __init__(self, trusted_proxies: List[str]):
+        self.trusted_proxies: List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]] = [
+            ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies
+        ]
+
+    def resolve(self, peer: Optional[str], forwarded_for: Optional[str]) -> Optional[str]:
+        if peer is None or not forwarded_for or not self._is_trusted(peer):
+            return peer
+
+        addresses: List[str] = [address.strip() for address in forwarded_for.split(",") if address.strip()]
+        for address in reversed(addresses):
+            if not self._is_trusted(address):
+                return address
+
+        return addresses[0] if addresses else peer
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+
+login_rate_limiter = LoginRateLimiter(backend=build_rate_limiter_backend())
+client_ip_resolver = ClientIPResolver(trusted_proxies=project_settings.TRUSTED_PROXIES)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Set
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.config import session_manager
+from src.services.bloom import BloomFilter
+from src.services.cache import TTLCache
+from src.services.dal import RevokedTokenDAL
+from src.settings import project_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _revocation_key(user_id: UUID, token_version: int) -> str:
+    return f"{user_id}:{token_version}"
+
+
+class RevocationService:
+    """
+    Класс, отвечающий за отзыв токенов. Отозванные версии токенов хранятся
+    в таблице revoked_token, а перед ней находится фильтр Блума в памяти
+    процесса: если версии токенов нет в фильтре, она точно не отозвана,
+    и обращения к базе данных не требуется
+
+    Фильтр периодически перестраивается из таблицы, поэтому отзыв, сделанный
+    другим процессом, начинает действовать в этом процессе не позднее чем
+    через REVOCATION_REBUILD_INTERVAL_SECONDS
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self._bloom_filter: BloomFilter = BloomFilter(capacity=capacity, error_rate=error_rate)
+        self._revoked: TTLCache[str, bool] = TTLCache(
+            max_size=capacity,
+            ttl=project_settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+        )
+        self._added_during_rebuild: Optional[Set[str]] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    async def revoke(self, db_session: AsyncSession, user_id: UUID, token_version: int) -> None:
+        """
+        Метод, отзывающий все токены пользователя с версией token_version
+        в транзакции переданной сессии. Запись хранится, пока не истечет
+        самый долгоживущий из выданных токенов (refresh token)
+        """
+
+        expires_at: datetime = datetime.utcnow() + timedelta(
+            days=project_settings.REFRESH_TOKEN_EXPIRE_DAYS
+        )
+        await RevokedTokenDAL(db_session=db_session).revoke(
+            user_id=user_id, token_version=token_version, expires_at=expires_at
+        )
+        self._add(_revocation_key(user_id=user_id, token_version=token_version))
+
+    async def is_revoked(self, user_id: UUID, token_version: int) -> bool:
+        """
+        Метод, проверяющий, отозвана ли версия токенов пользователя. К базе
+        данных обращается только при положительном ответе фильтра Блума
+        """
+
+        key: str = _revocation_key(user_id=user_id, token_version=token_version)
+        if key not in self._bloom_filter:
+            return False
+        if self._revoked.get(key):
+            return True
+
+        async with session_manager.async_session() as db_session:
+            revoked: bool = await RevokedTokenDAL(db_session=db_session).is_revoked(
+                user_id=user_id, token_version=token_version
+            )
+        if revoked:
+            self._revoked.set(key, True)
+        return revoked
+
+    async def rebuild(self) -> None:
+        """
+        Метод, перестраивающий фильтр Блума по неистекшим записям хранилища
+        и удаляющий истекшие записи. Размер фильтра увеличивается, если
+        количество записей превышает половину его емкости
+        """
+
+        self._added_during_rebuild = set()
+        try:
+            async with session_manager.async_session() as db_session, db_session.begin():
+                dal: RevokedTokenDAL = RevokedTokenDAL(db_session=db_session)
+                await dal.delete_expired()
+                rows = await dal.get_active()
+
+            bloom_filter: BloomFilter = BloomFilter.from_items(
+                (_revocation_key(user_id=row.user_id, token_version=row.token_version) for row in rows),
+                capacity=max(self.capacity, len(rows) * 2),
+                error_rate=self.error_rate,
+            )
+            for key in self._added_during_rebuild:
+                bloom_filter.add(key)
+            self._bloom_filter = bloom_filter
+        finally:
+            self._added_during_rebuild = None
+
+    async def start(self, interval: float) -> None:
+        """
+        Метод, строящий фильтр по хранилищу и запускающий его периодическое
+        перестроение. До построения фильтра отозванные ранее токены
+        принимались бы, поэтому приложение начинает обслуживать запросы
+        только после первого построения; ошибка при нем прерывает запуск
+        """
+
+        if self._rebuild_task is None:
+            await self.rebuild()
+            self._rebuild_task = asyncio.create_task(self._run_rebuilds(interval=interval))
+
+    async def close(self) -> None:
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            try:
+                await self._rebuild_task
+            except asyncio.CancelledError:
+                pass
+            self._rebuild_task = None
+
+    async def _run_rebuilds(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Cannot rebuild revoked tokens filter")
+
+    def _add(self, key: str) -> None:
+        self._bloom_filter.add(key)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.add(key)
+
+
+revocation_service = RevocationService(
+    capacity=project_settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=project_settings.REVOCATION_BLOOM_ERROR_RATE,
+)
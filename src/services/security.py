@@ -1,13 +1,32 @@
+import hashlib
+import time
 from datetime import timedelta, datetime
 from typing import Optional
 
-from jose import jwt
+from jose import jwt, JWTError
+from pydantic import ValidationError
 
+from src.schemas.schemas import TokenClaimsSchema
+from src.services.cache import TTLCache
 from src.settings import project_settings
 
+_verified_tokens: TTLCache[bytes, dict] = TTLCache(
+    max_size=project_settings.VERIFIED_TOKEN_CACHE_MAX_SIZE,
+    ttl=project_settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
-def create_jwt_token(email: str, exp_timedelta: timedelta) -> str:
-    data: dict = {"sub": email}
+
+def create_jwt_token(claims: TokenClaimsSchema, exp_timedelta: timedelta) -> str:
+    """
+    Функция, создающая токен доступа, в который записываются идентификатор
+    пользователя (sub), статус его верификации (ver) и версия токенов (tv)
+    """
+
+    data: dict = {
+        "sub": str(claims.user_id),
+        "ver": claims.is_verified,
+        "tv": claims.token_version,
+    }
 
     expire: datetime = datetime.utcnow() + exp_timedelta
     data.update({"exp": expire})
@@ -18,11 +37,50 @@ def create_jwt_token(email: str, exp_timedelta: timedelta) -> str:
     )
 
 
-def get_email_from_jwt_token(token: str) -> Optional[str]:
-    payload: dict = jwt.decode(
+def decode_jwt_token(token: str) -> dict:
+    """
+    Функция, проверяющая подпись и срок действия токена и возвращающая
+    его содержимое
+
+    Уже проверенные токены кэшируются по их SHA-256 до истечения срока
+    действия, поэтому повторное использование токена не требует повторной
+    проверки подписи. Токены без срока действия не кэшируются
+    """
+
+    digest: bytes = hashlib.sha256(token.encode()).digest()
+    payload: Optional[dict] = _verified_tokens.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(
         token,
         project_settings.SECRET_KEY,
         algorithms=[project_settings.ALGORITHM, ],
     )
-    email: str = payload.get("sub", None)
-    return email
+
+    expires_at = payload.get("exp", None)
+    if isinstance(expires_at, (int, float)):
+        ttl: float = expires_at - time.time()
+        if ttl > 0:
+            _verified_tokens.set(digest, payload, ttl=ttl)
+
+    return payload
+
+
+def get_claims_from_jwt_token(token: str) -> TokenClaimsSchema:
+    """
+    Функция, возвращающая данные о пользователе из токена доступа
+
+    Если токен некорректен или не содержит необходимых данных, возникает
+    исключение JWTError
+    """
+
+    payload: dict = decode_jwt_token(token=token)
+    try:
+        return TokenClaimsSchema(
+            user_id=payload.get("sub", None),
+            is_verified=payload.get("ver", None),
+            token_version=payload.get("tv", None),
+        )
+    except ValidationError:
+        raise JWTError("Invalid token claims")
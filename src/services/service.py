@@ -1,16 +1,51 @@
-from datetime import timedelta
-from typing import Optional, List, Dict
+import asyncio
+import logging
+from datetime import timedelta, datetime
+from typing import Optional, List, Dict, Tuple, AsyncIterator, Any, Set, Sequence
+from uuid import UUID
 
 from jose import jwt, JWTError
+from pydantic import ValidationError
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import User
-from src.services.dal import UserDAL
+from src.database.config import session_manager
+from src.database.models import User, EmailOutbox
+from src.schemas.schemas import ShowUserSchema, UserCreationSchema, BatchRegistrationItemSchema, \
+    TokenClaimsSchema
+from src.services.cache import current_user_cache
+from src.services.dal import UserDAL, EmailOutboxDAL
 from src.services.email import EmailService
 from src.services.hashing import Hasher
+from src.services.outbox import email_outbox_worker
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.revocation import revocation_service
 from src.services.security import create_jwt_token
 from src.settings import project_settings
 
+logger = logging.getLogger(__name__)
+
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _rehash_password(user_id: UUID, old_hashed_password: str, password: str) -> None:
+    """
+    Фоновая задача, перехеширующая пароль пользователя с текущими
+    параметрами хеширования. Выполняется в собственной сессии, так как
+    сессия запроса к этому моменту может быть уже закрыта
+    """
+
+    try:
+        new_hashed_password: str = await Hasher().get_password_hash(password)
+        async with session_manager.async_session() as db_session, db_session.begin():
+            await UserDAL(db_session=db_session).replace_password_hash(
+                user_id=user_id,
+                old_hashed_password=old_hashed_password,
+                new_hashed_password=new_hashed_password,
+            )
+    except Exception:
+        logger.exception("Cannot rehash password of user %s", user_id)
+
 
 class UserService:
     """
@@ -23,6 +58,7 @@ class UserService:
         """Инициализация объекта класса путем создания объектов необходимых сервисов"""
 
         self.dal: UserDAL = UserDAL(db_session=db_session)
+        self.outbox_dal: EmailOutboxDAL = EmailOutboxDAL(db_session=db_session)
         self.hasher: Hasher = Hasher()
         self.email = EmailService()
 
@@ -34,18 +70,45 @@ class UserService:
             username: str,
             password: str
     ) -> None:
-        user: Optional[User] = await self.dal.get_user_by_email(email=email)
+        """
+        Метод, регистрирующий пользователя. Письмо для подтверждения
+        регистрации добавляется в очередь в той же транзакции и отправляется
+        фоновым обработчиком после ее фиксации
+
+        Если неверифицированный пользователь регистрируется повторно, а письмо
+        ему уже отправлялось в течение EMAIL_RESEND_WINDOW_SECONDS, новое
+        письмо не создается: уже отправленное письмо с действующим токеном
+        отправляется повторно не более EMAIL_MAX_RESENDS_PER_WINDOW раз.
+        Пароль в этом случае не хешируется и не меняется, а обновляются
+        только отличающиеся от сохраненных имя, фамилия и username
+        """
+
+        with self.dal.on_primary():
+            user: Optional[User] = await self.dal.get_user_by_email(email=email)
 
         if user is not None:
             if user.is_verified:
                 raise ValueError("User already exists")
 
-            await self.dal.update_user_data(
+            email_resent: bool = await self._resend_recent_confirmation_email(
+                kind="registration", user=user, email=user.email
+            )
+            if email_resent:
+                changed_fields: Dict[str, str] = {
+                    key: value
+                    for key, value in (("name", name), ("surname", surname), ("username", username))
+                    if getattr(user, key) != value
+                }
+                if changed_fields:
+                    await self.dal.update_user(user=user, parameters_for_update=changed_fields)
+                return
+
+            user: User = await self.dal.update_user_data(
                 name=name,
                 surname=surname,
                 username=username,
-                password=self.hasher.get_password_hash(password),
-                user=user,
+                password=await self.hasher.get_password_hash(password),
+                user_id=user.user_id,
             )
 
         else:
@@ -54,38 +117,164 @@ class UserService:
                 surname=surname,
                 username=username,
                 email=email,
-                hashed_password=self.hasher.get_password_hash(password=password),
+                hashed_password=await self.hasher.get_password_hash(password=password),
             )
 
-        await self.email.send_email(
-            email=[
-                user.email,
-            ],
-            instance=user,
+        self._enqueue_confirmation_email(
+            kind="registration",
+            user=user,
+            email=user.email,
             subject="Письмо для подтверждения регистрации",
         )
 
+    async def create_users_batch(
+            self,
+            items: List[Dict[str, Any]],
+    ) -> List[BatchRegistrationItemSchema]:
+        """
+        Метод, регистрирующий пакет пользователей: одна проверка занятых
+        email и username, параллельное хеширование паролей и один многострочный
+        INSERT. Письма для подтверждения регистрации добавляются в очередь
+        в той же транзакции, как и при одиночной регистрации
+
+        Ошибка в отдельном элементе не прерывает обработку пакета. В отличие от
+        одиночной регистрации, уже существующий неверифицированный пользователь
+        считается конфликтом
+        """
+
+        results: Dict[int, BatchRegistrationItemSchema] = {}
+        valid_items: Dict[int, UserCreationSchema] = {}
+
+        for index, item in enumerate(items):
+            try:
+                valid_items[index] = UserCreationSchema.model_validate(item)
+            except ValidationError as exc:
+                results[index] = BatchRegistrationItemSchema(
+                    index=index,
+                    email=item["email"] if isinstance(item.get("email"), str) else None,
+                    status="invalid",
+                    detail="; ".join(error["msg"] for error in exc.errors()),
+                )
+
+        with self.dal.on_primary():
+            taken_emails, taken_usernames = await self.dal.get_taken_emails_and_usernames(
+                emails=[schema.email for schema in valid_items.values()],
+                usernames=[schema.username for schema in valid_items.values()],
+            )
+
+        for index, schema in list(valid_items.items()):
+            if schema.email.lower() in taken_emails or schema.username in taken_usernames:
+                results[index] = BatchRegistrationItemSchema(
+                    index=index,
+                    email=schema.email,
+                    status="conflict",
+                    detail="User with this credentials already exists",
+                )
+                del valid_items[index]
+            else:
+                taken_emails.add(schema.email.lower())
+                taken_usernames.add(schema.username)
+
+        hashed_passwords: List[str] = await self.hasher.get_password_hashes(
+            [schema.password1 for schema in valid_items.values()]
+        )
+        created_users: List[User] = []
+        if valid_items:
+            created_users = await self.dal.create_new_users(users_data=[
+                {
+                    "name": schema.name,
+                    "surname": schema.surname,
+                    "username": schema.username,
+                    "email": schema.email,
+                    "hashed_password": hashed_password,
+                }
+                for schema, hashed_password in zip(valid_items.values(), hashed_passwords)
+            ])
+
+        for user in created_users:
+            self._enqueue_confirmation_email(
+                kind="registration",
+                user=user,
+                email=user.email,
+                subject="Письмо для подтверждения регистрации",
+            )
+        created_emails: Set[str] = {user.email for user in created_users}
+
+        for index, schema in valid_items.items():
+            if schema.email in created_emails:
+                results[index] = BatchRegistrationItemSchema(
+                    index=index,
+                    email=schema.email,
+                    status="created",
+                )
+            else:
+                results[index] = BatchRegistrationItemSchema(
+                    index=index,
+                    email=schema.email,
+                    status="conflict",
+                    detail="User with this credentials already exists",
+                )
+
+        return [results[index] for index in range(len(items))]
+
     async def verify_email(self, token: str) -> User:
         payload: dict = jwt.decode(
             token, project_settings.SECRET_KEY,
             algorithms=["HS256"]
         )
 
-        user: Optional[User] = await self.dal.get_user_by_id(
+        user: Optional[User] = await self.dal.verify_user(
             user_id=payload.get("user_id", None)
         )
         if user is None:
             raise JWTError("Could not validate credentials")
 
-        await self.dal.verify_user(user=user)
         return user
 
-    async def get_users(self) -> List[User]:
-        users: List[User] = await self.dal.get_users()
-        return users
+    async def get_users(
+            self,
+            limit: int,
+            cursor: Optional[str] = None,
+    ) -> Tuple[Sequence[Row], Optional[str]]:
+        users: Sequence[Row] = await self.dal.get_users(
+            limit=limit + 1,
+            after=decode_cursor(cursor) if cursor is not None else None,
+        )
+
+        next_cursor: Optional[str] = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(
+                created_at=users[-1].created_at,
+                user_id=users[-1].user_id,
+            )
+
+        return users, next_cursor
+
+    @staticmethod
+    async def export_users(batch_size: int) -> AsyncIterator[bytes]:
+        """
+        Метод, выгружающий всех верифицированных пользователей в формате
+        NDJSON пачками по batch_size строк. Использует собственную сессию,
+        так как сессия запроса закрывается до начала отправки потокового ответа
+        """
+
+        async with session_manager.async_session() as db_session:
+            dal: UserDAL = UserDAL(db_session=db_session)
+            async for rows in dal.stream_users(batch_size=batch_size):
+                yield b"".join(
+                    ShowUserSchema.model_validate(row).model_dump_json().encode() + b"\n"
+                    for row in rows
+                )
 
     async def delete_user(self, user: User) -> None:
         await self.dal.delete_user(user=user)
+        await revocation_service.revoke(
+            db_session=self.dal.db_session,
+            user_id=user.user_id,
+            token_version=user.token_version,
+        )
+        self._invalidate_cached_user(user_id=user.user_id)
 
     async def login(self, username: str, password: str) -> dict:
         user: Optional[User] = await self.dal.get_user_by_username(username=username)
@@ -96,17 +285,27 @@ class UserService:
         if not user.is_verified:
             raise ValueError("User is not verified")
 
-        if not self.hasher.verify_password(
+        if not await self.hasher.verify_password(
                 hashed_password=user.hashed_password,
                 plain_password=password
         ):
             raise ValueError("Passwords do not match")
 
+        if self.hasher.needs_update(user.hashed_password):
+            task: asyncio.Task = asyncio.create_task(_rehash_password(
+                user_id=user.user_id,
+                old_hashed_password=user.hashed_password,
+                password=password,
+            ))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+        claims: TokenClaimsSchema = TokenClaimsSchema.model_validate(user)
         access_token: str = create_jwt_token(
-            user.email, timedelta(minutes=project_settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+            claims, timedelta(minutes=project_settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
         refresh_token: str = create_jwt_token(
-            user.email, timedelta(days=project_settings.REFRESH_TOKEN_EXPIRE_DAYS)
+            claims, timedelta(days=project_settings.REFRESH_TOKEN_EXPIRE_DAYS)
         )
 
         return {
@@ -116,9 +315,9 @@ class UserService:
         }
 
     @staticmethod
-    def refresh_token(user: User) -> dict:
+    def refresh_token(claims: TokenClaimsSchema) -> dict:
         new_access_token: str = create_jwt_token(
-            email=user.email,
+            claims=claims,
             exp_timedelta=timedelta(
                 minutes=project_settings.ACCESS_TOKEN_EXPIRE_MINUTES
             ),
@@ -133,11 +332,11 @@ class UserService:
             user: User,
             parameters_for_update: Dict[str, str],
     ) -> User:
-        await self.dal.update_user(
+        updated_user: User = await self.dal.update_user(
             user=user,
             parameters_for_update=parameters_for_update
         )
-        updated_user: User = await self.dal.get_user_by_id(user.user_id)
+        self._invalidate_cached_user(user_id=user.user_id)
 
         return updated_user
 
@@ -147,7 +346,7 @@ class UserService:
             old_password: str,
             new_password: str,
     ) -> User:
-        if not self.hasher.verify_password(
+        if not await self.hasher.verify_password(
                 hashed_password=user.hashed_password,
                 plain_password=old_password
         ):
@@ -155,8 +354,14 @@ class UserService:
 
         updated_user: Optional[User] = await self.dal.change_password(
             user=user,
-            new_password=self.hasher.get_password_hash(new_password),
+            new_password=await self.hasher.get_password_hash(new_password),
         )
+        await revocation_service.revoke(
+            db_session=self.dal.db_session,
+            user_id=user.user_id,
+            token_version=updated_user.token_version - 1,
+        )
+        self._invalidate_cached_user(user_id=user.user_id)
 
         return updated_user
 
@@ -164,9 +369,15 @@ class UserService:
         if user.email == new_email:
             raise ValueError("The user already uses this email")
 
-        await self.email.send_email(
-            email=[new_email, ],
-            instance=user,
+        if await self._resend_recent_confirmation_email(
+            kind="email_change", user=user, email=new_email
+        ):
+            return
+
+        self._enqueue_confirmation_email(
+            kind="email_change",
+            user=user,
+            email=new_email,
             subject="Письмо для подтверждения смены электронной почты",
         )
 
@@ -176,23 +387,86 @@ class UserService:
             project_settings.SECRET_KEY,
             algorithms=["HS256"]
         )
-        user: Optional[User] = await self.dal.get_user_by_id(
-            user_id=payload.get("user_id", None)
-        )
-
-        if user is None:
-            raise JWTError("Could not validate credentials")
-
-        if not user.is_verified:
-            raise ValueError("User is not verified")
-
         new_email: str = payload.get("email", None)
         if new_email is None:
             raise JWTError("Could not validate credentials")
 
-        updated_user: User = await self.dal.change_email(
-            user=user,
+        updated_user: Optional[User] = await self.dal.change_email(
+            user_id=payload.get("user_id", None),
             new_email=new_email,
         )
 
+        if updated_user is None:
+            with self.dal.on_primary():
+                user: Optional[User] = await self.dal.get_user_by_id(
+                    user_id=payload.get("user_id", None)
+                )
+            if user is None:
+                raise JWTError("Could not validate credentials")
+
+            raise ValueError("User is not verified")
+
+        self._invalidate_cached_user(user_id=updated_user.user_id)
         return updated_user
+
+    def _enqueue_confirmation_email(self, kind: str, user: User, email: str, subject: str) -> None:
+        """
+        Вспомогательный метод, добавляющий в очередь письмо с токеном для
+        подтверждения адреса электронной почты email
+        """
+
+        token_expires_at: datetime = datetime.utcnow() + timedelta(
+            seconds=project_settings.MAIL_CONFIRMATION_TOKEN_EXPIRE_SECONDS
+        )
+        self.outbox_dal.enqueue(
+            kind=kind,
+            user_id=user.user_id,
+            recipient=email,
+            subject=subject,
+            body=self.email.build_confirmation_body(
+                email=email, instance=user, expires_at=token_expires_at
+            ),
+            token_expires_at=token_expires_at,
+        )
+        email_outbox_worker.notify_after_commit(db_session=self.dal.db_session)
+
+    async def _resend_recent_confirmation_email(self, kind: str, user: User, email: str) -> bool:
+        """
+        Вспомогательный метод, проверяющий, отправлялось ли получателю письмо
+        для подтверждения в текущем окне EMAIL_RESEND_WINDOW_SECONDS
+
+        Если письмо не удалось отправить или токен в нем истек, создается
+        новое письмо. Если письмо еще не отправлено, ничего не делается.
+        Если оно уже отправлено и лимит повторных отправок не исчерпан,
+        письмо ставится в очередь повторно. Возвращает True, если новое
+        письмо создавать не нужно
+        """
+
+        now: datetime = datetime.utcnow()
+        email_in_window: Optional[EmailOutbox] = await self.outbox_dal.get_latest(
+            kind=kind,
+            user_id=user.user_id,
+            recipient=email,
+            created_after=now - timedelta(seconds=project_settings.EMAIL_RESEND_WINDOW_SECONDS),
+        )
+        if email_in_window is None:
+            return False
+
+        if (
+            email_in_window.status == "failed"
+            or email_in_window.token_expires_at is None
+            or email_in_window.token_expires_at <= now
+        ):
+            return False
+
+        if (
+            email_in_window.status == "sent"
+            and email_in_window.resend_count < project_settings.EMAIL_MAX_RESENDS_PER_WINDOW
+        ):
+            await self.outbox_dal.resend(email=email_in_window)
+            email_outbox_worker.notify_after_commit(db_session=self.dal.db_session)
+
+        return True
+
+    def _invalidate_cached_user(self, user_id: UUID) -> None:
+        current_user_cache.invalidate(user_id=user_id, db_session=self.dal.db_session)
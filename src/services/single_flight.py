@@ -0,0 +1,69 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from src.services.metrics import metrics_registry, Counter
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Класс, объединяющий одновременные вызовы с одинаковым ключом: пока
+    вызов выполняется, остальные вызовы с тем же ключом ожидают его
+    результат (или исключение) вместо того, чтобы выполнять работу повторно
+
+    Работу выполняет первый вызвавший (ведущий) в своей задаче, поэтому она
+    может использовать его ресурсы (например, сессию базы данных). Если
+    ведущий отменен, ожидающие выполняют работу сами
+    """
+
+    def __init__(self, name: str):
+        self._in_flight: Dict[K, "asyncio.Future[V]"] = {}
+        self.shared: Counter = metrics_registry.counter(
+            f'single_flight_shared_total{{name="{name}"}}'
+        )
+
+    async def do(
+            self,
+            key: K,
+            function: Callable[[], Awaitable[V]],
+            share: Optional[Callable[[V], V]] = None,
+    ) -> V:
+        """
+        Метод, выполняющий function или ожидающий результат уже выполняющегося
+        вызова с тем же ключом. Ожидающие получают результат ведущего,
+        преобразованный функцией share (например, в копию, не связанную
+        с ресурсами ведущего); share вызывается один раз сразу по завершении
+        работы, до того как ведущий продолжит выполнение
+        """
+
+        future: Optional["asyncio.Future[V]"] = self._in_flight.get(key)
+        if future is not None:
+            self.shared.inc()
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            return await function()
+
+        future = asyncio.get_running_loop().create_future()
+        # исключение ведущего может никем больше не ожидаться
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = future
+        try:
+            result: V = await function()
+            shared: V = result if share is None else share(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(shared)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
@@ -0,0 +1,223 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import AsyncIterator, Deque, List, Optional, Sequence
+
+from aiosmtplib import SMTP, SMTPResponseException, SMTPRecipientsRefused
+
+from src.settings import project_settings
+
+
+@dataclass
+class PooledConnection:
+    """Соединение пула вместе со временем последнего использования и числом отправленных писем"""
+
+    client: SMTP
+    last_used: float = field(default_factory=time.monotonic)
+    messages_sent: int = 0
+
+
+class SMTPConnectionPool:
+    """
+    Пул авторизованных соединений с почтовым сервером. Соединение
+    устанавливается (TCP, TLS и AUTH) один раз и используется повторно
+    для отправки многих писем
+
+    Соединения, простаивавшие дольше idle_timeout, закрываются фоновой
+    задачей. Перед выдачей соединения, простаивавшего дольше
+    health_check_after, его работоспособность проверяется командой NOOP.
+    После max_messages_per_connection писем соединение закрывается, так
+    как почтовые серверы ограничивают количество писем в одном сеансе
+    """
+
+    def __init__(
+            self,
+            hostname: str,
+            port: int,
+            size: int,
+            idle_timeout: float,
+            health_check_after: float,
+            max_messages_per_connection: int,
+            batch_size: int,
+            username: Optional[str] = None,
+            password: Optional[str] = None,
+            use_tls: bool = False,
+            start_tls: bool = False,
+            validate_certs: bool = True,
+            timeout: float = 30,
+    ):
+        self.hostname: str = hostname
+        self.port: int = port
+        self.username: Optional[str] = username
+        self.password: Optional[str] = password
+        self.use_tls: bool = use_tls
+        self.start_tls: bool = start_tls
+        self.validate_certs: bool = validate_certs
+        self.timeout: float = timeout
+
+        self.size: int = size
+        self.idle_timeout: float = idle_timeout
+        self.health_check_after: float = health_check_after
+        self.max_messages_per_connection: int = max_messages_per_connection
+        self.batch_size: int = batch_size
+
+        self._idle: Deque[PooledConnection] = deque()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap_idle_connections())
+
+    async def close(self) -> None:
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                pass
+            self._reaper_task = None
+
+        while self._idle:
+            await self._close_connection(self._idle.pop())
+
+    async def send_messages(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        Метод, отправляющий письма пачками по batch_size писем на одно
+        соединение; пачки отправляются параллельно по разным соединениям
+
+        Возвращает для каждого письма исключение, если его отправить
+        не удалось, или None
+        """
+
+        batches: List[Sequence[EmailMessage]] = [
+            messages[index:index + self.batch_size]
+            for index in range(0, len(messages), self.batch_size)
+        ]
+        results: List[List[Optional[Exception]]] = await asyncio.gather(*(
+            self._send_batch(batch) for batch in batches
+        ))
+
+        return [error for batch_results in results for error in batch_results]
+
+    async def _send_batch(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        Вспомогательный метод, отправляющий пачку писем по одному соединению.
+        Отказ сервера принять отдельное письмо не прерывает отправку пачки,
+        а при разрыве соединения ошибка записывается всем неотправленным письмам
+        """
+
+        results: List[Optional[Exception]] = []
+        try:
+            async with self._connection() as connection:
+                for message in messages:
+                    try:
+                        await connection.client.send_message(message)
+                        results.append(None)
+                    except (SMTPResponseException, SMTPRecipientsRefused) as exc:
+                        results.append(exc)
+                    connection.messages_sent += 1
+
+        except Exception as exc:
+            results.extend([exc] * (len(messages) - len(results)))
+
+        return results
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[PooledConnection]:
+        """
+        Вспомогательный контекстный менеджер, выдающий соединение из пула.
+        Соединение возвращается в пул, только если работа с ним завершилась
+        без ошибок и лимит писем на соединение не исчерпан
+        """
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+
+        async with self._semaphore:
+            connection: PooledConnection = await self._get_connection()
+            try:
+                yield connection
+            except BaseException:
+                connection.client.close()
+                raise
+
+            connection.last_used = time.monotonic()
+            if connection.messages_sent >= self.max_messages_per_connection:
+                await self._close_connection(connection)
+            else:
+                self._idle.append(connection)
+
+    async def _get_connection(self) -> PooledConnection:
+        while self._idle:
+            connection: PooledConnection = self._idle.pop()
+            idle_for: float = time.monotonic() - connection.last_used
+
+            if idle_for > self.idle_timeout or not connection.client.is_connected:
+                await self._close_connection(connection)
+                continue
+
+            if idle_for > self.health_check_after:
+                try:
+                    await connection.client.noop()
+                except Exception:
+                    await self._close_connection(connection)
+                    continue
+
+            return connection
+
+        client: SMTP = SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+            timeout=self.timeout,
+        )
+        await client.connect()
+
+        return PooledConnection(client=client)
+
+    @staticmethod
+    async def _close_connection(connection: PooledConnection) -> None:
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    async def _reap_idle_connections(self) -> None:
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+
+            now: float = time.monotonic()
+            expired: List[PooledConnection] = [
+                connection for connection in self._idle
+                if now - connection.last_used > self.idle_timeout
+            ]
+            for connection in expired:
+                if connection in self._idle:
+                    self._idle.remove(connection)
+                    await self._close_connection(connection)
+
+
+smtp_pool = SMTPConnectionPool(
+    hostname=project_settings.MAIL_SERVER,
+    port=project_settings.MAIL_PORT,
+    username=project_settings.MAIL_USERNAME if project_settings.USE_CREDENTIALS else None,
+    password=project_settings.MAIL_PASSWORD if project_settings.USE_CREDENTIALS else None,
+    use_tls=project_settings.MAIL_SSL_TLS,
+    start_tls=project_settings.MAIL_STARTTLS,
+    validate_certs=project_settings.VALIDATE_CERTS,
+    timeout=project_settings.SMTP_TIMEOUT_SECONDS,
+    size=project_settings.SMTP_POOL_SIZE,
+    idle_timeout=project_settings.SMTP_POOL_IDLE_TIMEOUT_SECONDS,
+    health_check_after=project_settings.SMTP_POOL_HEALTH_CHECK_AFTER_SECONDS,
+    max_messages_per_connection=project_settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    batch_size=project_settings.SMTP_POOL_BATCH_SIZE,
+)
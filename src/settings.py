@@ -1,4 +1,5 @@
 import os
+from typing import List, Optional, Literal
 
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
@@ -11,6 +12,10 @@ class ProjectSettings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    VERIFIED_TOKEN_CACHE_MAX_SIZE: int = 10000
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.01
+    REVOCATION_REBUILD_INTERVAL_SECONDS: float = 30
 
     MAIL_CONFIRMATION_TOKEN_EXPIRE_SECONDS: int
     MAIL_USERNAME: str
@@ -23,8 +28,50 @@ class ProjectSettings(BaseSettings):
     USE_CREDENTIALS: bool
     VALIDATE_CERTS: bool
 
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_IDLE_TIMEOUT_SECONDS: float = 60
+    SMTP_POOL_HEALTH_CHECK_AFTER_SECONDS: float = 15
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_BATCH_SIZE: int = 10
+    SMTP_TIMEOUT_SECONDS: float = 30
+
+    EMAIL_RESEND_WINDOW_SECONDS: float = 300
+    EMAIL_MAX_RESENDS_PER_WINDOW: int = 1
+
+    EMAIL_OUTBOX_WORKERS: int = 2
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS: float = 1
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 60
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: float = 5
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: float = 3600
+
     PWD_SCHEMA: str
     PWD_DEPRECATED: str
+    PWD_ROUNDS: Optional[int] = None
+    HASHING_EXECUTOR: Literal["process", "thread"] = "process"
+    HASHING_WORKERS: Optional[int] = None
+    HASHING_BULK_CONCURRENCY: Optional[int] = 2
+
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = 5
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    TRUSTED_PROXIES: List[str] = []
+
+    CURRENT_USER_CACHE_TTL_SECONDS: float = 5
+    CURRENT_USER_CACHE_MAX_SIZE: int = 10000
+
+    USERS_PAGE_DEFAULT_LIMIT: int = 50
+    USERS_PAGE_MAX_LIMIT: int = 500
+    USERS_EXPORT_BATCH_SIZE: int = 1000
+
+    ADMIN_API_KEY: Optional[str] = None
+
+    BATCH_REGISTRATION_MAX_SIZE: int = 500
+
+    DEBUG: bool = False
+    QUERY_COUNT_BUDGET: int = 10
 
     APP_TITLE: str
     APP_HOST: str
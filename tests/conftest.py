@@ -0,0 +1,31 @@
+import os
+
+# Настройки проекта читаются при импорте модулей src, поэтому значения
+# по умолчанию для обязательных переменных окружения задаются до импорта
+for name, value in {
+    "SECRET_KEY": "test-secret-key",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "MAIL_CONFIRMATION_TOKEN_EXPIRE_SECONDS": "3600",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_PORT": "1025",
+    "MAIL_SERVER": "127.0.0.1",
+    "MAIL_STARTTLS": "False",
+    "MAIL_SSL_TLS": "False",
+    "USE_CREDENTIALS": "False",
+    "VALIDATE_CERTS": "False",
+    "PWD_SCHEMA": "bcrypt",
+    "PWD_DEPRECATED": "auto",
+    "APP_TITLE": "FETestTask",
+    "APP_HOST": "127.0.0.1",
+    "APP_PORT": "8000",
+    "DB_HOST": "127.0.0.1",
+    "DB_PORT": "5432",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_NAME": "postgres",
+}.items():
+    os.environ.setdefault(name, value)
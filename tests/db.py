@@ -0,0 +1,57 @@
+import os
+from typing import Iterator, List
+
+import pytest
+from alembic.config import Config
+from sqlalchemy import Engine, create_engine, text
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_test_database_url() -> str:
+    """
+    Функция, возвращающая адрес отдельной тестовой базы данных из переменной
+    TEST_DATABASE_URL (postgresql://...). Тесты удаляют все ее таблицы,
+    поэтому без явно заданной базы они пропускаются
+    """
+
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+def alembic_config(url: str) -> Config:
+    config: Config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def create_test_engine(url: str) -> Engine:
+    return create_engine(url, isolation_level="AUTOCOMMIT")
+
+
+def index_is_valid(engine: Engine, name: str) -> bool:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(CAST(:name AS text))"),
+            {"name": name},
+        ).scalar()
+
+
+def plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(connection, statement) -> List[dict]:
+    """Функция, возвращающая все узлы плана выполнения запроса SQLAlchemy"""
+
+    compiled = statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+    )
+    return list(plan_nodes(result.scalar()[0]["Plan"]))
+
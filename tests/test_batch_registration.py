@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Dict, List, Set, Tuple
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.schemas.schemas import BatchRegistrationItemSchema
+from src.services.service import UserService
+
+
+class RecordingUserDAL:
+    def __init__(self, taken_emails: Set[str], taken_usernames: Set[str], raced_usernames: Set[str] = frozenset()):
+        self.taken_emails: Set[str] = taken_emails
+        self.taken_usernames: Set[str] = taken_usernames
+        self.raced_usernames: Set[str] = set(raced_usernames)
+        self.inserted: List[Dict[str, str]] = []
+
+    def on_primary(self):
+        return nullcontext()
+
+    async def get_taken_emails_and_usernames(self, emails: List[str], usernames: List[str]) -> Tuple[
+        Set[str], Set[str]
+    ]:
+        return set(self.taken_emails), set(self.taken_usernames)
+
+    async def create_new_users(self, users_data: List[Dict[str, str]]) -> List[User]:
+        self.inserted = users_data
+        return [
+            User(user_id=uuid4(), **data)
+            for data in users_data
+            if data["username"] not in self.raced_usernames
+        ]
+
+
+class FakeHasher:
+    async def get_password_hashes(self, passwords: List[str]) -> List[str]:
+        return [f"hash:{password}" for password in passwords]
+
+
+def item(username: str, email: str, **overrides) -> dict:
+    data: dict = {
+        "name": "Name",
+        "surname": "Surname",
+        "username": username,
+        "email": email,
+        "password1": "Password1!",
+        "password2": "Password1!",
+    }
+    data.update(overrides)
+    return data
+
+
+def register_batch(items: List[dict], dal: RecordingUserDAL) -> Tuple[List[BatchRegistrationItemSchema], List[str]]:
+    service: UserService = UserService(db_session=AsyncSession())
+    service.dal = dal
+    service.hasher = FakeHasher()
+    enqueued: List[str] = []
+    service._enqueue_confirmation_email = lambda kind, user, email, subject: enqueued.append(email)
+
+    return asyncio.run(service.create_users_batch(items=items)), enqueued
+
+
+def test_every_item_gets_a_status_in_request_order() -> None:
+    dal: RecordingUserDAL = RecordingUserDAL(taken_emails={"taken@example.com"}, taken_usernames={"taken"})
+
+    results, enqueued = register_batch([
+        item("alice", "alice@example.com"),
+        item("bob", "not-an-email"),
+        item("someone", "Taken@Example.com"),
+        item("taken", "new@example.com"),
+        item("carol", "carol@example.com", password2="Mismatch1!"),
+        item("dave", "dave@example.com"),
+        {"username": "broken"},
+    ], dal=dal)
+
+    assert [(result.index, result.status) for result in results] == [
+        (0, "created"),
+        (1, "invalid"),
+        (2, "conflict"),
+        (3, "conflict"),
+        (4, "invalid"),
+        (5, "created"),
+        (6, "invalid"),
+    ]
+    assert results[1].email == "not-an-email"
+    assert results[6].email is None
+    assert all(result.detail is None for result in results if result.status == "created")
+    assert [data["username"] for data in dal.inserted] == ["alice", "dave"]
+    assert all(data["hashed_password"] == "hash:Password1!" for data in dal.inserted)
+    assert enqueued == ["alice@example.com", "dave@example.com"]
+
+
+def test_duplicates_inside_one_batch_conflict_after_the_first() -> None:
+    dal: RecordingUserDAL = RecordingUserDAL(taken_emails=set(), taken_usernames=set())
+
+    results, enqueued = register_batch([
+        item("alice", "alice@example.com"),
+        item("alice2", "ALICE@example.com"),
+        item("alice", "other@example.com"),
+        item("bob", "bob@example.com"),
+    ], dal=dal)
+
+    assert [result.status for result in results] == ["created", "conflict", "conflict", "created"]
+    assert [data["username"] for data in dal.inserted] == ["alice", "bob"]
+    assert enqueued == ["alice@example.com", "bob@example.com"]
+
+
+def test_rows_skipped_by_insert_are_reported_as_conflicts() -> None:
+    dal: RecordingUserDAL = RecordingUserDAL(taken_emails=set(), taken_usernames=set(), raced_usernames={"bob"})
+
+    results, enqueued = register_batch([
+        item("alice", "alice@example.com"),
+        item("bob", "bob@example.com"),
+    ], dal=dal)
+
+    assert [result.status for result in results] == ["created", "conflict"]
+    assert enqueued == ["alice@example.com"]
@@ -0,0 +1,44 @@
+import math
+from typing import List
+
+import pytest
+
+from src.services.bloom import BloomFilter
+
+
+def test_sizing_follows_capacity_and_error_rate() -> None:
+    bloom_filter: BloomFilter = BloomFilter(capacity=1000, error_rate=0.01)
+
+    assert bloom_filter.size == math.ceil(-1000 * math.log(0.01) / math.log(2) ** 2)
+    assert bloom_filter.hash_count == 7
+
+
+@pytest.mark.parametrize("capacity", [0, 1, 10])
+def test_small_filters_are_usable(capacity: int) -> None:
+    bloom_filter: BloomFilter = BloomFilter.from_items(["only"], capacity=capacity, error_rate=0.01)
+
+    assert "only" in bloom_filter
+
+
+def test_added_items_are_always_found() -> None:
+    items: List[str] = [f"user-{index}:{index % 7}" for index in range(10000)]
+
+    bloom_filter: BloomFilter = BloomFilter.from_items(items, capacity=len(items), error_rate=0.01)
+
+    assert all(item in bloom_filter for item in items)
+
+
+def test_false_positive_rate_stays_near_error_rate() -> None:
+    bloom_filter: BloomFilter = BloomFilter.from_items(
+        (f"revoked-{index}" for index in range(10000)), capacity=10000, error_rate=0.01
+    )
+
+    false_positives: int = sum(f"active-{index}" in bloom_filter for index in range(100000))
+
+    assert false_positives / 100000 < 0.02
+
+
+def test_empty_filter_contains_nothing() -> None:
+    bloom_filter: BloomFilter = BloomFilter(capacity=100, error_rate=0.01)
+
+    assert "anything" not in bloom_filter
@@ -0,0 +1,83 @@
+import pytest
+
+from src.services import cache
+from src.services.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock: Clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_value_expires_after_ttl(clock: Clock) -> None:
+    users: TTLCache[str, int] = TTLCache(max_size=10, ttl=5)
+    users.set("a", 1)
+
+    clock.now += 4.9
+    assert users.get("a") == 1
+
+    clock.now += 0.1
+    assert users.get("a") is None
+    assert len(users) == 0
+
+
+def test_value_ttl_overrides_cache_ttl(clock: Clock) -> None:
+    users: TTLCache[str, int] = TTLCache(max_size=10, ttl=5)
+    users.set("short", 1, ttl=1)
+    users.set("long", 2, ttl=60)
+
+    clock.now += 30
+    assert users.get("short") is None
+    assert users.get("long") == 2
+
+
+def test_least_recently_used_value_is_evicted(clock: Clock) -> None:
+    users: TTLCache[str, int] = TTLCache(max_size=2, ttl=5)
+    users.set("a", 1)
+    users.set("b", 2)
+    assert users.get("a") == 1
+
+    users.set("c", 3)
+
+    assert users.get("b") is None
+    assert users.get("a") == 1
+    assert users.get("c") == 3
+    assert len(users) == 2
+
+
+def test_overwrite_refreshes_position_and_ttl(clock: Clock) -> None:
+    users: TTLCache[str, int] = TTLCache(max_size=2, ttl=5)
+    users.set("a", 1)
+    users.set("b", 2)
+
+    clock.now += 4
+    users.set("a", 10)
+    users.set("c", 3)
+
+    clock.now += 4
+    assert users.get("a") == 10
+    assert users.get("b") is None
+
+
+def test_pop_and_clear(clock: Clock) -> None:
+    users: TTLCache[str, int] = TTLCache(max_size=10, ttl=5)
+    users.set("a", 1)
+    users.set("b", 2)
+
+    users.pop("a")
+    users.pop("missing")
+    assert users.get("a") is None
+    assert len(users) == 1
+
+    users.clear()
+    assert len(users) == 0
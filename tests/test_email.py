@@ -0,0 +1,31 @@
+from email.message import EmailMessage
+from email.utils import parsedate_to_datetime
+
+from src.services.email import EmailService
+from src.settings import project_settings
+
+
+def test_message_has_date_and_unique_message_id() -> None:
+    first: EmailMessage = EmailService.build_message(
+        recipients=["user@example.com", ], subject="Subject", body="Body"
+    )
+    second: EmailMessage = EmailService.build_message(
+        recipients=["user@example.com", ], subject="Subject", body="Body"
+    )
+
+    assert parsedate_to_datetime(first["Date"]).tzinfo is not None
+    assert first["Message-ID"] != second["Message-ID"]
+    assert first["Message-ID"].startswith("<")
+    assert first["Message-ID"].endswith(f"@{project_settings.MAIL_FROM.rpartition('@')[2]}>")
+
+
+def test_message_id_is_stable_for_the_same_email() -> None:
+    messages = [
+        EmailService.build_message(
+            recipients=["user@example.com", ], subject="Subject", body="Body", message_id="outbox-1"
+        )
+        for _ in range(2)
+    ]
+
+    assert messages[0]["Message-ID"] == messages[1]["Message-ID"]
+    assert messages[0]["Message-ID"].startswith("<outbox-1@")
@@ -0,0 +1,35 @@
+from typing import AsyncIterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.service import UserService
+from src.settings import project_settings
+
+ADMIN_API_KEY: str = "test-admin-key"
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    async def export_users(batch_size: int) -> AsyncIterator[bytes]:
+        yield b'{"username": "alice"}\n'
+
+    monkeypatch.setattr(project_settings, "ADMIN_API_KEY", ADMIN_API_KEY)
+    monkeypatch.setattr(UserService, "export_users", staticmethod(export_users))
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Api-Key": "wrong"}])
+def test_export_requires_admin_api_key(client: TestClient, headers: dict) -> None:
+    response = client.get("/api/user/export", headers=headers)
+
+    assert response.status_code == 403
+
+
+def test_export_streams_ndjson_with_admin_api_key(client: TestClient) -> None:
+    response = client.get("/api/user/export", headers={"X-Admin-Api-Key": ADMIN_API_KEY})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text == '{"username": "alice"}\n'
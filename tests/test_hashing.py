@@ -0,0 +1,84 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from src.services.hashing import HashingExecutor
+
+
+def exit_in_pool_process() -> str:
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return threading.current_thread().name
+
+
+class ConcurrencyProbe:
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self.running: int = 0
+        self.max_running: int = 0
+
+    def __call__(self, value: int) -> int:
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self._lock:
+            self.running -= 1
+        return value * 2
+
+
+@pytest.fixture
+def executor() -> HashingExecutor:
+    executor: HashingExecutor = HashingExecutor()
+    yield executor
+    executor.shutdown()
+
+
+def test_broken_process_pool_is_replaced_once(executor: HashingExecutor, monkeypatch) -> None:
+    executor.start(kind="process", workers=1)
+    replacements: List[int] = []
+    start_thread_pool = executor._start_thread_pool
+
+    def counting_start_thread_pool() -> None:
+        replacements.append(1)
+        start_thread_pool()
+
+    monkeypatch.setattr(executor, "_start_thread_pool", counting_start_thread_pool)
+
+    async def run_all() -> List[str]:
+        return await asyncio.gather(*(executor.run(exit_in_pool_process) for _ in range(4)))
+
+    thread_names: List[str] = asyncio.run(run_all())
+
+    assert len(replacements) == 1
+    assert isinstance(executor._executor, ThreadPoolExecutor)
+    assert all(name.startswith("hasher") for name in thread_names)
+
+
+def test_run_bulk_is_bounded_and_keeps_order(executor: HashingExecutor) -> None:
+    probe: ConcurrencyProbe = ConcurrencyProbe()
+
+    async def run_bulk() -> List[int]:
+        executor.start(kind="thread", workers=8, bulk_concurrency=2)
+        return await executor.run_bulk(probe, [(value, ) for value in range(10)])
+
+    assert asyncio.run(run_bulk()) == [value * 2 for value in range(10)]
+    assert probe.max_running == 2
+
+
+def test_run_bulk_without_limit_uses_whole_pool(executor: HashingExecutor) -> None:
+    probe: ConcurrencyProbe = ConcurrencyProbe()
+
+    async def run_bulk() -> List[int]:
+        executor.start(kind="thread", workers=4)
+        return await executor.run_bulk(probe, [(value, ) for value in range(8)])
+
+    asyncio.run(run_bulk())
+
+    assert probe.max_running == 4
@@ -0,0 +1,146 @@
+import asyncio
+from typing import Any, List, Set, Tuple
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.dependencies import get_db_session
+from src.main import app
+from src.schemas.schemas import ImportReportSchema
+from src.services.importer import UserImporter, parse_csv, parse_ndjson
+from src.settings import project_settings
+
+ADMIN_API_KEY: str = "test-admin-key"
+
+
+def test_parse_csv_returns_rows_with_line_numbers() -> None:
+    content: str = (
+        "name,surname,username,email,password\n"
+        "Alice,Smith,alice,alice@example.com,Password1!\n"
+        '"Bob, Jr",Brown,bob,bob@example.com,Password1!\n'
+    )
+
+    rows: List[Tuple[int, Any]] = list(parse_csv(content))
+
+    assert [row for row, _ in rows] == [2, 3]
+    assert rows[0][1]["email"] == "alice@example.com"
+    assert rows[1][1]["name"] == "Bob, Jr"
+
+
+def test_parse_ndjson_marks_malformed_lines_and_skips_blank_ones() -> None:
+    content: str = '{"name": "Alice"}\n\nnot json\n{"name": "Bob"}\n'
+
+    assert list(parse_ndjson(content)) == [(1, {"name": "Alice"}), (3, None), (4, {"name": "Bob"})]
+
+
+class RecordingUserDAL:
+    def __init__(self, taken_usernames: Set[str]):
+        self.taken_usernames: Set[str] = taken_usernames
+        self.records: List[tuple] = []
+
+    async def bulk_create_users(self, records: List[tuple]) -> Set[UUID]:
+        self.records = records
+        created: Set[UUID] = set()
+        for user_id, _, _, username, *_ in records:
+            if username not in self.taken_usernames:
+                self.taken_usernames.add(username)
+                created.add(user_id)
+        return created
+
+
+class FakeHasher:
+    async def get_password_hashes(self, passwords: List[str]) -> List[str]:
+        return [f"hash:{password}" for password in passwords]
+
+
+def import_content(content: str, import_format: str, taken_usernames: Set[str]) -> Tuple[
+    ImportReportSchema, RecordingUserDAL
+]:
+    importer: UserImporter = UserImporter.__new__(UserImporter)
+    importer.dal = RecordingUserDAL(taken_usernames=taken_usernames)
+    importer.hasher = FakeHasher()
+    report: ImportReportSchema = asyncio.run(
+        importer.import_content(content=content, import_format=import_format, is_verified=True)
+    )
+    return report, importer.dal
+
+
+def test_import_reports_invalid_rows_and_skips_conflicts() -> None:
+    content: str = (
+        "name,surname,username,email,password\n"
+        "Alice,Smith,alice,alice@example.com,Password1!\n"
+        "Bob,Brown,bob,not-an-email,Password1!\n"
+        "Taken,User,taken,taken@example.com,Password1!\n"
+        "Alice,Again,alice,alice2@example.com,Password1!\n"
+        "Carol,White,carol,carol@example.com,Password1!\n"
+    )
+
+    report, dal = import_content(content, "csv", taken_usernames={"taken"})
+
+    assert report.created == 2
+    assert [(error.row, error.status) for error in report.errors] == [
+        (3, "invalid"), (4, "conflict"), (5, "conflict"),
+    ]
+    assert report.errors[1].email == "taken@example.com"
+    assert [record[3] for record in dal.records] == ["alice", "taken", "alice", "carol"]
+    assert all(record[5].startswith("hash:") and record[6] is True for record in dal.records)
+
+
+def test_import_reports_malformed_ndjson_rows() -> None:
+    content: str = (
+        '{"name": "Alice", "surname": "Smith", "username": "alice", '
+        '"email": "alice@example.com", "password": "Password1!"}\n'
+        "[1, 2]\n"
+        "{broken\n"
+    )
+
+    report, _ = import_content(content, "ndjson", taken_usernames=set())
+
+    assert report.created == 1
+    assert [(error.row, error.detail) for error in report.errors] == [
+        (2, "Malformed row"), (3, "Malformed row"),
+    ]
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    async def no_db_session():
+        yield None
+
+    monkeypatch.setattr(project_settings, "ADMIN_API_KEY", ADMIN_API_KEY)
+    app.dependency_overrides[get_db_session] = no_db_session
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db_session, None)
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Api-Key": "wrong"}])
+def test_import_requires_admin_api_key(client: TestClient, headers: dict) -> None:
+    response = client.post(
+        "/api/admin/users/import",
+        files={"file": ("users.csv", b"name,surname,username,email,password\n")},
+        headers=headers,
+    )
+
+    assert response.status_code == 403
+
+
+def test_import_rejects_non_utf8_file(client: TestClient) -> None:
+    response = client.post(
+        "/api/admin/users/import",
+        files={"file": ("users.csv", "name,surname\nÉlise,Dupont\n".encode("latin-1"))},
+        headers={"X-Admin-Api-Key": ADMIN_API_KEY},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File must be encoded in UTF-8"
+
+
+def test_import_rejects_unknown_format(client: TestClient) -> None:
+    response = client.post(
+        "/api/admin/users/import",
+        files={"file": ("users.xlsx", b"")},
+        headers={"X-Admin-Api-Key": ADMIN_API_KEY},
+    )
+
+    assert response.status_code == 400
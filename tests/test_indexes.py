@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Iterator, List, Set
+
+import pytest
+from alembic import command
+from sqlalchemy import Engine, select, text, tuple_
+from uuid import UUID
+
+from src.database.models import User
+from src.services.dal import USER_PROFILE_COLUMNS, select_user_by_email
+from tests.db import alembic_config, create_test_engine, explain, get_test_database_url
+
+USERS_COUNT: int = 20000
+
+
+@pytest.fixture(scope="module")
+def engine() -> Iterator[Engine]:
+    """
+    Тестовая база данных, приведенная миграциями к последней ревизии
+    и заполненная пользователями, половина из которых верифицирована
+    """
+
+    url: str = get_test_database_url()
+    config = alembic_config(url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+    engine: Engine = create_test_engine(url)
+    with engine.connect() as connection:
+        connection.execute(text(
+            'INSERT INTO "user" '
+            "(user_id, name, surname, username, email, hashed_password, is_verified, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'Name', 'Surname', 'user' || i, 'User' || i || '@Example.com', 'hash', "
+            "i % 2 = 0, now() - i * interval '1 minute', now() - i * interval '1 minute' "
+            "FROM generate_series(1, :count) AS i"
+        ), {"count": USERS_COUNT})
+        connection.execute(text('VACUUM ANALYZE "user"'))
+
+    yield engine
+
+    engine.dispose()
+    command.downgrade(config, "base")
+
+
+def used_indexes(engine: Engine, statement) -> Set[str]:
+    with engine.connect() as connection:
+        # на небольшой таблице последовательное чтение может оказаться
+        # дешевле, поэтому проверяется, что индекс вообще применим
+        connection.execute(text("SET enable_seqscan = off"))
+        nodes: List[dict] = explain(connection, statement)
+    return {node["Index Name"] for node in nodes if "Index Name" in node}
+
+
+def test_listing_uses_covering_partial_index(engine: Engine) -> None:
+    statement = (
+        select(*USER_PROFILE_COLUMNS, User.created_at, User.user_id).
+        filter_by(is_verified=True).
+        order_by(User.created_at, User.user_id).
+        limit(50)
+    )
+
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        nodes: List[dict] = explain(connection, statement)
+
+    assert {
+        (node["Node Type"], node["Index Name"]) for node in nodes if "Index Name" in node
+    } == {("Index Only Scan", "ix_user_verified_created_at")}
+    assert not any(node["Node Type"] == "Sort" for node in nodes)
+
+
+def test_listing_page_after_cursor_uses_partial_index(engine: Engine) -> None:
+    statement = (
+        select(*USER_PROFILE_COLUMNS, User.created_at, User.user_id).
+        filter_by(is_verified=True).
+        where(
+            tuple_(User.created_at, User.user_id)
+            > tuple_(datetime.utcnow() - timedelta(days=3), UUID(int=0))
+        ).
+        order_by(User.created_at, User.user_id).
+        limit(50)
+    )
+
+    assert used_indexes(engine, statement) == {"ix_user_verified_created_at"}
+
+
+def test_email_lookup_uses_lower_email_index(engine: Engine) -> None:
+    statement = select_user_by_email(email="USER42@example.COM")
+
+    assert used_indexes(engine, statement) == {"uq_user_email_lower"}
+
+
+def test_updated_at_query_uses_updated_at_index(engine: Engine) -> None:
+    statement = (
+        select(User.user_id).
+        where(User.updated_at > datetime.utcnow() - timedelta(hours=1)).
+        order_by(User.updated_at)
+    )
+
+    assert used_indexes(engine, statement) == {"ix_user_updated_at"}
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.database.instrumentation import QueryStats, current_query_stats, instrument_queries
+
+
+@pytest.fixture
+def engine() -> Engine:
+    engine: Engine = create_engine("sqlite://")
+    instrument_queries(engine=SimpleNamespace(sync_engine=engine))
+    return engine
+
+
+@pytest.fixture
+def stats() -> QueryStats:
+    stats: QueryStats = QueryStats()
+    token = current_query_stats.set(stats)
+    yield stats
+    current_query_stats.reset(token)
+
+
+def test_counts_executed_queries(engine: Engine, stats: QueryStats) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+
+    assert stats.count == 2
+    assert stats.duration > 0
+
+
+def test_failed_query_is_counted_and_leaves_nothing_on_connection(engine: Engine, stats: QueryStats) -> None:
+    with engine.connect() as connection:
+        info_before: dict = dict(connection.info)
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        connection.execute(text("SELECT 1"))
+
+        assert connection.info == info_before
+    assert stats.count == 2
@@ -0,0 +1,38 @@
+import pytest
+from alembic import command
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import IntegrityError
+
+from tests.db import alembic_config, create_test_engine, get_test_database_url, index_is_valid
+
+
+def test_rerun_rebuilds_index_left_invalid_by_failed_concurrent_build() -> None:
+    url: str = get_test_database_url()
+    config = alembic_config(url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "f8203400838e")
+
+    engine: Engine = create_test_engine(url)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text(
+                'INSERT INTO "user" '
+                "(user_id, name, surname, username, email, hashed_password, is_verified) VALUES "
+                "(gen_random_uuid(), 'Name', 'Surname', 'first', 'Same@example.com', 'hash', true), "
+                "(gen_random_uuid(), 'Name', 'Surname', 'second', 'same@example.com', 'hash', true)"
+            ))
+
+        with pytest.raises(IntegrityError):
+            command.upgrade(config, "17126eee7952")
+        assert index_is_valid(engine, "uq_user_email_lower") is False
+
+        with engine.connect() as connection:
+            connection.execute(text("DELETE FROM \"user\" WHERE username = 'second'"))
+        command.upgrade(config, "head")
+
+        assert index_is_valid(engine, "uq_user_email_lower") is True
+        assert index_is_valid(engine, "ix_user_verified_created_at") is True
+        assert index_is_valid(engine, "ix_user_updated_at") is True
+    finally:
+        engine.dispose()
+        command.downgrade(config, "base")
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import EmailOutbox
+from src.services.dal import EmailOutboxDAL
+from src.services.outbox import EmailOutboxWorker, WAKEUP_SCHEDULED_KEY
+
+
+def test_notify_after_commit_wakes_workers_once_per_transaction() -> None:
+    worker: EmailOutboxWorker = EmailOutboxWorker()
+    db_session: AsyncSession = AsyncSession()
+
+    for _ in range(500):
+        worker.notify_after_commit(db_session=db_session)
+
+    assert not worker._wakeup.is_set()
+    db_session.sync_session.commit()
+
+    assert worker._wakeup.is_set()
+    assert WAKEUP_SCHEDULED_KEY not in db_session.info
+
+    worker._wakeup.clear()
+    worker.notify_after_commit(db_session=db_session)
+    db_session.sync_session.commit()
+    assert worker._wakeup.is_set()
+
+
+def test_retry_is_scheduled_while_token_is_valid() -> None:
+    email: EmailOutbox = EmailOutbox(attempts=1, token_expires_at=datetime.utcnow() + timedelta(minutes=5))
+
+    next_attempt_at = EmailOutboxWorker._next_attempt_at(email=email, error=ConnectionError())
+
+    assert next_attempt_at is not None
+    assert next_attempt_at < email.token_expires_at
+
+
+def test_no_retry_is_scheduled_after_token_expires() -> None:
+    email: EmailOutbox = EmailOutbox(attempts=7, token_expires_at=datetime.utcnow() + timedelta(minutes=5))
+
+    assert EmailOutboxWorker._next_attempt_at(email=email, error=ConnectionError()) is None
+
+
+def test_emails_without_token_keep_full_backoff() -> None:
+    email: EmailOutbox = EmailOutbox(attempts=7, token_expires_at=None)
+
+    assert EmailOutboxWorker._next_attempt_at(email=email, error=ConnectionError()) is not None
+
+
+def test_claim_fails_emails_with_expired_tokens_before_claiming() -> None:
+    statements: List[str] = []
+
+    class RecordingSession:
+        async def execute(self, statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    asyncio.run(EmailOutboxDAL(db_session=RecordingSession()).claim(limit=10, lease_seconds=60))
+
+    expire, claim = statements
+    assert "email_outbox.token_expires_at <=" in expire
+    assert expire.startswith("UPDATE email_outbox SET status")
+    assert "FOR UPDATE SKIP LOCKED" in claim
@@ -0,0 +1,49 @@
+import base64
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from src.services.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    created_at: datetime = datetime(2024, 5, 17, 12, 30, 45, 123456)
+    user_id = uuid4()
+
+    cursor: str = encode_cursor(created_at=created_at, user_id=user_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, user_id)
+
+
+def encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    encode(b"\xff\xfe"),
+    encode(b"not json"),
+    encode(b"null"),
+    encode(b'"ab"'),
+    encode(b'["2024-05-17T12:30:45"]'),
+    encode(b'[1, 2]'),
+    encode(b'["yesterday", "6f1d5a9e-59c5-4a5b-9f0e-0b7c3f3c2d1a"]'),
+    encode(b'["2024-05-17T12:30:45", "not-a-uuid"]'),
+])
+def test_invalid_cursor_is_rejected(cursor: str) -> None:
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 5, 17, 12, 30, 45, tzinfo=timezone.utc),
+    datetime(2024, 5, 17, 12, 30, 45, tzinfo=timezone(timedelta(hours=3))),
+])
+def test_cursor_with_timezone_is_rejected(created_at: datetime) -> None:
+    cursor: str = encode_cursor(created_at=created_at, user_id=uuid4())
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
@@ -0,0 +1,32 @@
+import asyncio
+import sqlite3
+import time
+from typing import Type
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import greenlet_spawn
+
+from src.database.metrics import PoolMetrics, instrumented_pool_class
+
+
+def slow_connect() -> sqlite3.Connection:
+    time.sleep(0.05)
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+def test_connect_time_is_not_counted_as_checkout_wait() -> None:
+    metrics: PoolMetrics = PoolMetrics(name="test_connect", wait_warning_seconds=1)
+    pool_class: Type[AsyncAdaptedQueuePool] = instrumented_pool_class(metrics=metrics)
+    pool = pool_class(creator=slow_connect, pool_size=1, max_overflow=0)
+
+    def check_out_twice() -> None:
+        pool.connect().close()
+        pool.connect().close()
+
+    asyncio.run(greenlet_spawn(check_out_twice))
+
+    assert metrics.connect_seconds.count == 1
+    assert metrics.connect_seconds.sum >= 0.05
+    assert metrics.wait_seconds.count == 2
+    assert metrics.wait_seconds.sum < 0.02
+    pool.dispose()
@@ -0,0 +1,141 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src import dependencies
+from src.services import rate_limit
+from src.services.rate_limit import (
+    ClientIPResolver,
+    InMemoryRateLimiterBackend,
+    LoginRateLimiter,
+    SlidingWindowRateLimiter,
+)
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now: float = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock: Clock = Clock(now=6000.0)
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+
+def hit_many(limiter: SlidingWindowRateLimiter, key: str, count: int) -> List[Optional[int]]:
+    async def hit_all() -> List[Optional[int]]:
+        return [await limiter.hit(key=key) for _ in range(count)]
+
+    return asyncio.run(hit_all())
+
+
+def test_limit_is_enforced_within_window(clock: Clock) -> None:
+    limiter = SlidingWindowRateLimiter(backend=InMemoryRateLimiterBackend(), limit=3, window_seconds=60)
+
+    clock.now += 15
+    assert hit_many(limiter, "key", 4) == [None, None, None, 45]
+    assert hit_many(limiter, "other", 1) == [None]
+
+
+def test_previous_window_is_weighted_by_overlap(clock: Clock) -> None:
+    limiter = SlidingWindowRateLimiter(backend=InMemoryRateLimiterBackend(), limit=4, window_seconds=60)
+    assert hit_many(limiter, "key", 4) == [None] * 4
+
+    # прошла четверть следующего окна: три четверти предыдущих попыток
+    # (3 из 4) еще учитываются, поэтому доступна одна попытка
+    clock.now += 75
+    assert hit_many(limiter, "key", 2) == [None, 45]
+
+    # окно, в котором были первые попытки, полностью вышло из скользящего окна
+    clock.now += 60
+    assert hit_many(limiter, "key", 2) == [None, None]
+
+
+def test_retry_after_is_at_least_one_second(clock: Clock) -> None:
+    limiter = SlidingWindowRateLimiter(backend=InMemoryRateLimiterBackend(), limit=1, window_seconds=60)
+
+    clock.now += 59.9
+    assert hit_many(limiter, "key", 2) == [None, 1]
+
+
+def test_login_limits_are_per_username_and_per_ip(clock: Clock) -> None:
+    limiter = LoginRateLimiter(backend=InMemoryRateLimiterBackend())
+    limiter.by_username.limit = 2
+    limiter.by_ip.limit = 3
+
+    async def attempts() -> List[Optional[int]]:
+        return [
+            await limiter.hit(username="Alice", client_ip="10.0.0.1"),
+            await limiter.hit(username="alice", client_ip="10.0.0.2"),
+            await limiter.hit(username="ALICE", client_ip="10.0.0.3"),
+            await limiter.hit(username="bob", client_ip="10.0.0.3"),
+            await limiter.hit(username="carol", client_ip="10.0.0.3"),
+            await limiter.hit(username="dave", client_ip="10.0.0.3"),
+            await limiter.hit(username="erin", client_ip=None),
+        ]
+
+    assert asyncio.run(attempts()) == [None, None, 60, None, None, 60, None]
+
+
+@pytest.mark.parametrize("peer, forwarded_for, expected", [
+    ("203.0.113.7", None, "203.0.113.7"),
+    ("203.0.113.7", "198.51.100.1", "203.0.113.7"),
+    ("10.0.0.5", None, "10.0.0.5"),
+    ("10.0.0.5", "198.51.100.1", "198.51.100.1"),
+    ("10.0.0.5", "1.2.3.4, 198.51.100.1, 10.0.0.9", "198.51.100.1"),
+    ("10.0.0.5", "10.0.0.8, 10.0.0.9", "10.0.0.8"),
+    ("10.0.0.5", "spoofed, 198.51.100.1", "198.51.100.1"),
+    ("::1", "2001:db8::1", "2001:db8::1"),
+    (None, "198.51.100.1", None),
+])
+def test_client_ip_is_taken_from_trusted_proxies_only(
+        peer: Optional[str], forwarded_for: Optional[str], expected: Optional[str]
+) -> None:
+    resolver = ClientIPResolver(trusted_proxies=["10.0.0.0/8", "::1"])
+
+    assert resolver.resolve(peer=peer, forwarded_for=forwarded_for) == expected
+
+
+def test_throttled_login_returns_429_with_retry_after(clock: Clock, monkeypatch) -> None:
+    limiter = LoginRateLimiter(backend=InMemoryRateLimiterBackend())
+    limiter.by_username.limit = 100
+    limiter.by_ip.limit = 2
+    monkeypatch.setattr(dependencies, "login_rate_limiter", limiter)
+    monkeypatch.setattr(dependencies, "client_ip_resolver", ClientIPResolver(trusted_proxies=["10.0.0.0/8"]))
+
+    app = FastAPI()
+
+    @app.post("/login", dependencies=[Depends(dependencies.throttle_login), ])
+    async def login() -> dict:
+        return {}
+
+    async def behind_proxy(scope, receive, send) -> None:
+        scope["client"] = ("10.0.0.5", 50000)
+        await app(scope, receive, send)
+
+    client = TestClient(behind_proxy)
+
+    def login_from(address: str, username: str):
+        return client.post(
+            "/login",
+            data={"username": username, "password": "password"},
+            headers={"X-Forwarded-For": address},
+        )
+
+    assert login_from("198.51.100.1", "a").status_code == 200
+    assert login_from("198.51.100.1", "b").status_code == 200
+
+    response = login_from("198.51.100.1", "c")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+
+    # другой клиент за тем же прокси не затрагивается
+    assert login_from("198.51.100.2", "d").status_code == 200
@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.services.service import UserService
+
+
+class RecordingUserDAL:
+    def __init__(self, user: User):
+        self.user: User = user
+        self.db_session: AsyncSession = AsyncSession()
+        self.updates: List[dict] = []
+
+    def on_primary(self):
+        return nullcontext()
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return self.user
+
+    async def update_user(self, user: User, parameters_for_update: Dict[str, str]) -> User:
+        self.updates.append(parameters_for_update)
+        return self.user
+
+    async def update_user_data(self, user_id, **data) -> User:
+        self.updates.append(data)
+        return self.user
+
+
+class CountingHasher:
+    def __init__(self):
+        self.calls: int = 0
+
+    async def get_password_hash(self, password: str) -> str:
+        self.calls += 1
+        return f"hash:{password}"
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        self.calls += 1
+        return hashed_password == f"hash:{plain_password}"
+
+
+def registration(email_resent: bool, monkeypatch):
+    user: User = User(
+        user_id=uuid4(),
+        name="Alice",
+        surname="Smith",
+        username="alice",
+        email="alice@example.com",
+        hashed_password="hash:Password1!",
+        is_verified=False,
+    )
+    service: UserService = UserService(db_session=AsyncSession())
+    service.dal = RecordingUserDAL(user=user)
+    service.hasher = CountingHasher()
+    enqueued: List[str] = []
+
+    async def resend_recent_confirmation_email(kind: str, user: User, email: str) -> bool:
+        return email_resent
+
+    monkeypatch.setattr(service, "_resend_recent_confirmation_email", resend_recent_confirmation_email)
+    monkeypatch.setattr(
+        service, "_enqueue_confirmation_email", lambda kind, user, email, subject: enqueued.append(email)
+    )
+    return service, enqueued
+
+
+def register(service: UserService, **overrides) -> None:
+    data: dict = {
+        "name": "Alice",
+        "surname": "Smith",
+        "email": "alice@example.com",
+        "username": "alice",
+        "password": "Password1!",
+    }
+    data.update(overrides)
+    asyncio.run(service.create_user(**data))
+
+
+@pytest.mark.parametrize("overrides", [{}, {"password": "NewPassword1!"}])
+def test_repeated_registration_in_window_does_no_hashing(overrides: dict, monkeypatch) -> None:
+    service, enqueued = registration(email_resent=True, monkeypatch=monkeypatch)
+
+    register(service, **overrides)
+
+    assert service.hasher.calls == 0
+    assert service.dal.updates == []
+    assert enqueued == []
+
+
+def test_changed_profile_in_window_is_saved_without_hashing(monkeypatch) -> None:
+    service, enqueued = registration(email_resent=True, monkeypatch=monkeypatch)
+
+    register(service, name="Alicia", username="alice2", password="NewPassword1!")
+
+    assert service.hasher.calls == 0
+    assert service.dal.updates == [{"name": "Alicia", "username": "alice2"}]
+    assert enqueued == []
+
+
+def test_registration_outside_resend_window_hashes_once_and_queues_email(monkeypatch) -> None:
+    service, enqueued = registration(email_resent=False, monkeypatch=monkeypatch)
+
+    register(service, password="NewPassword1!")
+
+    assert service.hasher.calls == 1
+    assert service.dal.updates[0]["password"] == "hash:NewPassword1!"
+    assert enqueued == ["alice@example.com"]
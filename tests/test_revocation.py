@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import List
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.services import revocation
+from src.services.revocation import RevocationService
+
+
+class FakeSession:
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+
+class FakeSessionManager:
+    @asynccontextmanager
+    async def async_session(self):
+        yield FakeSession()
+
+
+class StoredRevocations:
+    rows: List[SimpleNamespace] = []
+    rebuilds: int = 0
+
+    def __init__(self, db_session: FakeSession):
+        pass
+
+    async def delete_expired(self) -> None:
+        pass
+
+    async def get_active(self) -> List[SimpleNamespace]:
+        StoredRevocations.rebuilds += 1
+        return StoredRevocations.rows
+
+    async def is_revoked(self, user_id: UUID, token_version: int) -> bool:
+        return any(
+            row.user_id == user_id and row.token_version == token_version
+            for row in StoredRevocations.rows
+        )
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch) -> None:
+    StoredRevocations.rows = []
+    StoredRevocations.rebuilds = 0
+    monkeypatch.setattr(revocation, "session_manager", FakeSessionManager())
+    monkeypatch.setattr(revocation, "RevokedTokenDAL", StoredRevocations)
+
+
+def test_tokens_revoked_before_restart_are_rejected_right_after_start() -> None:
+    user_id: UUID = uuid4()
+    StoredRevocations.rows = [SimpleNamespace(user_id=user_id, token_version=3)]
+    service: RevocationService = RevocationService(capacity=1000, error_rate=0.01)
+
+    async def run() -> tuple:
+        await service.start(interval=3600)
+        try:
+            return (
+                await service.is_revoked(user_id=user_id, token_version=3),
+                await service.is_revoked(user_id=user_id, token_version=4),
+            )
+        finally:
+            await service.close()
+
+    assert asyncio.run(run()) == (True, False)
+    assert StoredRevocations.rebuilds == 1
+
+
+def test_failed_initial_rebuild_aborts_start(monkeypatch) -> None:
+    service: RevocationService = RevocationService(capacity=1000, error_rate=0.01)
+
+    async def failing_get_active(self) -> list:
+        raise ConnectionError("database is unavailable")
+
+    monkeypatch.setattr(StoredRevocations, "get_active", failing_get_active)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.start(interval=3600))
+
+    assert service._rebuild_task is None
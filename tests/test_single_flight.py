@@ -0,0 +1,173 @@
+import asyncio
+from typing import List
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import inspect
+
+from src.database.models import User
+from src.database.routing import PRIMARY_KEY, WROTE_KEY
+from src.services.dal import coalesced_read
+from src.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    single_flight: SingleFlight[str, int] = SingleFlight(name="test_sharing")
+    calls: List[str] = []
+
+    async def work(caller: str) -> int:
+        calls.append(caller)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def run() -> List[int]:
+        return await asyncio.gather(*(
+            single_flight.do(key="key", function=lambda caller=caller: work(caller))
+            for caller in ("first", "second", "third")
+        ))
+
+    shared_before: int = single_flight.shared.value
+    assert asyncio.run(run()) == [42, 42, 42]
+    assert calls == ["first"]
+    assert single_flight.shared.value - shared_before == 2
+
+
+def test_different_keys_and_later_calls_are_not_shared() -> None:
+    single_flight: SingleFlight[str, int] = SingleFlight(name="test_keys")
+    calls: List[str] = []
+
+    async def work(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    async def run() -> None:
+        await asyncio.gather(
+            single_flight.do(key="a", function=lambda: work("a")),
+            single_flight.do(key="b", function=lambda: work("b")),
+        )
+        await single_flight.do(key="a", function=lambda: work("a"))
+
+    asyncio.run(run())
+    assert calls == ["a", "b", "a"]
+
+
+def test_error_is_propagated_to_every_caller() -> None:
+    single_flight: SingleFlight[str, int] = SingleFlight(name="test_errors")
+
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise LookupError("boom")
+
+    async def run() -> list:
+        return await asyncio.gather(
+            *(single_flight.do(key="key", function=fail) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results: list = asyncio.run(run())
+    assert [type(result) for result in results] == [LookupError] * 3
+
+
+def test_followers_get_shared_value_and_leader_gets_its_own() -> None:
+    single_flight: SingleFlight[str, list] = SingleFlight(name="test_share")
+
+    async def work() -> list:
+        await asyncio.sleep(0.01)
+        return ["leader"]
+
+    async def run() -> list:
+        return await asyncio.gather(*(
+            single_flight.do(key="key", function=work, share=lambda value: value + ["copy"])
+            for _ in range(2)
+        ))
+
+    assert asyncio.run(run()) == [["leader"], ["leader", "copy"]]
+
+
+def test_followers_do_the_work_when_leader_is_cancelled() -> None:
+    single_flight: SingleFlight[str, str] = SingleFlight(name="test_cancel")
+
+    async def work(caller: str) -> str:
+        await asyncio.sleep(0.05)
+        return caller
+
+    async def run() -> list:
+        leader = asyncio.create_task(single_flight.do(key="key", function=lambda: work("leader")))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.do(key="key", function=lambda: work("follower")))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(run())
+    assert isinstance(leader_result, asyncio.CancelledError)
+    assert follower_result == "follower"
+
+
+class RecordingSession:
+    def __init__(self, **info):
+        self.info: dict = info
+        self.merged: List[User] = []
+
+    async def merge(self, instance: User, load: bool = True) -> User:
+        assert load is False
+        assert inspect(instance).detached
+        self.merged.append(instance)
+        return instance
+
+
+class RecordingDAL:
+    queries: List[RecordingSession] = []
+
+    def __init__(self, db_session: RecordingSession):
+        self.db_session: RecordingSession = db_session
+
+    @coalesced_read
+    async def get_user_by_username(self, username: str) -> User:
+        RecordingDAL.queries.append(self.db_session)
+        await asyncio.sleep(0.01)
+        return User(user_id=uuid4(), username=username)
+
+
+@pytest.fixture(autouse=True)
+def clear_queries() -> None:
+    RecordingDAL.queries.clear()
+
+
+def test_coalesced_read_runs_query_in_leader_session() -> None:
+    sessions: List[RecordingSession] = [RecordingSession() for _ in range(3)]
+
+    async def run() -> List[User]:
+        return await asyncio.gather(*(
+            RecordingDAL(db_session=session).get_user_by_username("alice") for session in sessions
+        ))
+
+    users: List[User] = asyncio.run(run())
+
+    assert RecordingDAL.queries == [sessions[0]]
+    assert sessions[0].merged == []
+    assert inspect(users[0]).transient
+    assert [len(session.merged) for session in sessions[1:]] == [1, 1]
+    assert {user.user_id for user in users} == {users[0].user_id}
+    assert all(user.username == "alice" for user in users)
+
+
+def test_coalesced_read_keeps_primary_reads_apart_and_skips_sessions_that_wrote() -> None:
+    replica, primary, other_primary, wrote = (
+        RecordingSession(),
+        RecordingSession(**{PRIMARY_KEY: True}),
+        RecordingSession(**{PRIMARY_KEY: True}),
+        RecordingSession(**{PRIMARY_KEY: True, WROTE_KEY: True}),
+    )
+
+    async def run() -> None:
+        await asyncio.gather(*(
+            RecordingDAL(db_session=session).get_user_by_username("alice")
+            for session in (replica, primary, other_primary, wrote)
+        ))
+
+    asyncio.run(run())
+
+    assert RecordingDAL.queries == [replica, primary, wrote]
+    assert len(other_primary.merged) == 1
@@ -0,0 +1,108 @@
+import asyncio
+from email.message import EmailMessage
+from typing import List, Optional
+
+from aiosmtplib import SMTPResponseException
+
+from benchmarks.smtp_sink import SMTPSink
+from src.services.email import EmailService
+from src.services.smtp_pool import SMTPConnectionPool
+
+
+def build_pool(sink: SMTPSink, size: int = 2, batch_size: int = 5, max_messages: int = 100) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        hostname=sink.host,
+        port=sink.port,
+        size=size,
+        idle_timeout=60,
+        health_check_after=15,
+        max_messages_per_connection=max_messages,
+        batch_size=batch_size,
+        timeout=5,
+    )
+
+
+def build_messages(count: int) -> List[EmailMessage]:
+    return [
+        EmailService.build_message(
+            recipients=[f"user{index}@example.com", ], subject="Subject", body="Body"
+        )
+        for index in range(count)
+    ]
+
+
+def test_messages_are_delivered_over_reused_connections() -> None:
+    async def run() -> tuple:
+        async with SMTPSink() as sink:
+            pool: SMTPConnectionPool = build_pool(sink)
+            first: List[Optional[Exception]] = await pool.send_messages(build_messages(20))
+            second: List[Optional[Exception]] = await pool.send_messages(build_messages(10))
+            await pool.close()
+            return first + second, sink.accepted, sink.connections
+
+    results, accepted, connections = asyncio.run(run())
+
+    assert results == [None] * 30
+    assert accepted == 30
+    assert connections == 2
+
+
+def test_rejected_messages_do_not_break_the_connection() -> None:
+    async def run() -> tuple:
+        async with SMTPSink(failure_rate=1) as sink:
+            pool: SMTPConnectionPool = build_pool(sink, size=1)
+            results: List[Optional[Exception]] = await pool.send_messages(build_messages(7))
+            await pool.close()
+            return results, sink.rejected, sink.connections
+
+    results, rejected, connections = asyncio.run(run())
+
+    assert all(isinstance(error, SMTPResponseException) and error.code == 451 for error in results)
+    assert rejected == 7
+    assert connections == 1
+
+
+def test_dropped_connection_fails_the_rest_of_the_batch_and_is_replaced() -> None:
+    async def run() -> tuple:
+        async with SMTPSink(disconnect_rate=1) as sink:
+            pool: SMTPConnectionPool = build_pool(sink, size=1, batch_size=3)
+            dropped: List[Optional[Exception]] = await pool.send_messages(build_messages(3))
+            sink.disconnect_rate = 0
+            delivered: List[Optional[Exception]] = await pool.send_messages(build_messages(3))
+            await pool.close()
+            return dropped, delivered, sink.dropped, sink.accepted, sink.connections
+
+    dropped, delivered, dropped_count, accepted, connections = asyncio.run(run())
+
+    assert len(dropped) == 3 and all(error is not None for error in dropped)
+    assert dropped_count == 1
+    assert delivered == [None] * 3
+    assert accepted == 3
+    assert connections == 2
+
+
+def test_connection_is_closed_after_message_limit() -> None:
+    async def run() -> tuple:
+        async with SMTPSink() as sink:
+            pool: SMTPConnectionPool = build_pool(sink, size=1, batch_size=3, max_messages=3)
+            results: List[Optional[Exception]] = await pool.send_messages(build_messages(9))
+            await pool.close()
+            return results, sink.connections
+
+    results, connections = asyncio.run(run())
+
+    assert results == [None] * 9
+    assert connections == 3
+
+
+def test_email_service_sends_through_pool() -> None:
+    async def run() -> int:
+        async with SMTPSink() as sink:
+            pool: SMTPConnectionPool = build_pool(sink)
+            await EmailService(pool=pool).send_message(
+                recipients=["user@example.com", ], subject="Subject", body="Body"
+            )
+            await pool.close()
+            return sink.accepted
+
+    assert asyncio.run(run()) == 1